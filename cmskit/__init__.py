@@ -1 +1,3 @@
 VERSION = (3, 0, 0,)
+
+default_app_config = 'cmskit.apps.CMSKitConfig'
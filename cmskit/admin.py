@@ -1,34 +1,44 @@
 import re
-from importlib import import_module
+import copy
 from functools import update_wrapper
+from weakref import WeakKeyDictionary
 
 from django import forms
-from django.conf import settings
 from django.contrib import admin
 from django.contrib import messages
 from django.contrib.admin import helpers
-from django.contrib.admin.views.main import ERROR_FLAG
+from django.contrib.admin.views.main import ERROR_FLAG, ChangeList
 from django.contrib.admin.options import TO_FIELD_VAR, csrf_protect_m
 from django.contrib.admin.exceptions import DisallowedModelAdminToField
-from django.contrib.admin.utils import quote, unquote
+from django.contrib.admin.utils import flatten_fieldsets, quote, unquote
 from django.contrib.admindocs.views import extract_views_from_urlpatterns
 from django.contrib.contenttypes.models import ContentType
 from django.core import checks
-from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import (ImproperlyConfigured, PermissionDenied,
+                                    ValidationError)
+from django.core.paginator import Paginator
 from django.forms.models import modelform_factory
+from django.http import Http404, JsonResponse
 from django.shortcuts import redirect
 from django.template.response import TemplateResponse
+from django.db.models import BooleanField, Case, Q, Value, When
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django.utils.encoding import force_str
-from django.urls import reverse, path
+from django.urls import reverse, path, get_resolver
 from django.urls.exceptions import NoReverseMatch
 
 from cmskit.models import BasePage
+from cmskit.models.constraints import (NOT_CREATABLE, PARENT_NOT_ALLOWED,
+                                       MAX_COUNT_REACHED)
 from cmskit.utils.admin import FieldsetsDictMixin
+from cmskit.utils.pagination import EstimatedCountPaginator
+from cmskit.widgets import PageTreeWidget
 from cmskit import conf
 
 
 ERROR_VALUE_FOR_REDIRECT = 7
+TREE_PARENT_VAR = 'tree_parent'
 
 
 # Admin forms
@@ -61,17 +71,18 @@ class BaseTargetFormMixin(forms.ModelForm):
         tp = cleaned_data.get('target_page', None)
 
         model = tt and tt.model_class()
-        if model and not model.is_creatable:
+        reason = model and self.Meta.model.get_page_type_availability(
+            tp).get_reason(model)
+        if reason == NOT_CREATABLE:
             raise forms.ValidationError(
                 _('Page with class "%(class)s" is not createble.') %
-                model.__name__)
-        if (model and model.max_count and
-                model.objects.count() >= model.max_count):
+                {'class': model.__name__,})
+        if reason == MAX_COUNT_REACHED:
             raise forms.ValidationError(
                 _('Page with class "%(class)s" exceeded max_count'
                   ' instances limit (%(limit)d).') %
                 {'class': model.__name__, 'limit': model.max_count,})
-        if model and tt and tp and not model.can_create_at(tp):
+        if reason == PARENT_NOT_ALLOWED:
             raise forms.ValidationError(
                 _('Page with class "%(class)s" can not be created'
                   ' at page with class "%(parent_class)s", allowed parent'
@@ -94,11 +105,38 @@ class BaseChoiceFieldsFormMixin(forms.ModelForm):
         'url_name': {'allow_empty': True,},
     }
 
+    # computed choices, shared by all form instances in process,
+    # {key: (resolver, choices)}, resolver is None for urls independent keys
+    choices_cache = {}
+    # form classes with compiled base fields, {form class: resolver}
+    compiled_forms = WeakKeyDictionary()
+
     def __init__(self, *args, **kwargs):
+        self.compile_base_fields()
         super().__init__(*args, **kwargs)
 
+        # choices of dynamic fields are computed for each form instance
         for name, conf in self.choice_fields.items():
-            self.fields[name] = self.generate_choice_field(name, conf)
+            if conf.get('dynamic', False):
+                self.fields[name] = self.generate_choice_field(name, conf)
+
+    def compile_base_fields(self):
+        """
+        Put generated fields into base_fields of form class once, form
+        instances get them as deep copies, form class is recompiled when
+        root url resolver is reset.
+        """
+        resolver = get_resolver()
+        if self.compiled_forms.get(type(self), None) is not resolver:
+            type(self).base_fields.update(self.get_compiled_fields())
+            self.compiled_forms[type(self)] = resolver
+
+    def get_compiled_fields(self):
+        return {
+            name: self.generate_choice_field(name, conf)
+            for name, conf in self.choice_fields.items()
+            if not conf.get('dynamic', False)
+        }
 
     def generate_choice_field(self, name, conf=None):
         conf = conf or self.choice_fields.get(name, None) or {}
@@ -116,18 +154,35 @@ class BaseChoiceFieldsFormMixin(forms.ModelForm):
                  if conf.get('allow_empty', False) else []) +
                 getattr(self, 'get_%s_choices' % name)())
 
+    def get_cached_choices(self, key, getter, depends_on_urls=False):
+        """
+        Get choices, computed once per process for key, urls dependent
+        values are recomputed when root url resolver is reset.
+        """
+        resolver = get_resolver() if depends_on_urls else None
+        cached = self.choices_cache.get(key, None)
+        if cached is None or cached[0] is not resolver:
+            cached = (resolver, getter(),)
+            self.choices_cache[key] = cached
+        return list(cached[1])
+
     # choices getters
     def get_url_name_choices(self):
-        urlconf = import_module(settings.ROOT_URLCONF)
-        ignored = self.Meta.model.URL_NAME_IGNORED or ()
+        return self.get_cached_choices(
+            ('url_name', self.Meta.model,),
+            self.build_url_name_choices, depends_on_urls=True)
+
+    def build_url_name_choices(self):
+        ignored = [re.compile(i) for i in
+                   self.Meta.model.URL_NAME_IGNORED or ()]
         choices = [
             (':'.join(ns + [name]), path)
             for func, path, ns, name in extract_views_from_urlpatterns(
-                urlconf.urlpatterns)
+                get_resolver().url_patterns)
             if name and not('(?P' in path or '<' in path)
         ]
         return [(name, '/%s (%s)' % (url, name)) for name, url in choices
-                if not ignored or not any(re.match(i, name) for i in ignored)]
+                if not any(i.match(name) for i in ignored)]
 
     def get_base_template_choices(self):
         return [(i['code'], i['name'],) for i in conf.TEMPLATES]
@@ -148,10 +203,17 @@ class BasePageForm(BaseChoiceFieldsFormMixin, BaseTargetFormMixin):
         if self.instance.pk:
             self.fields['target_type'].required = False
 
-        self.fields['menu_extender'].help_text = (
-            f'{self.fields["menu_extender"].help_text} Available values: '
-            f'{", ".join(v for v in self.get_menu_extender_values()) or "-"}.'
-        )
+    def get_compiled_fields(self):
+        fields = super().get_compiled_fields()
+        if 'menu_extender' in self.base_fields:
+            field = copy.deepcopy(self.base_fields['menu_extender'])
+            field.help_text = (
+                f'{self.Meta.model._meta.get_field("menu_extender").help_text}'
+                f' Available values: '
+                f'{", ".join(self.get_menu_extender_values()) or "-"}.'
+            )
+            fields['menu_extender'] = field
+        return fields
 
     def clean(self):
         cleaned_data = super().clean()
@@ -171,20 +233,39 @@ class BasePageForm(BaseChoiceFieldsFormMixin, BaseTargetFormMixin):
         return ', '.join(values)
 
     def get_menu_extender_values(self):
+        return self.get_cached_choices(
+            ('menu_extender',), self.build_menu_extender_values)
+
+    def build_menu_extender_values(self):
         try:
             from nodes.base import registry
             registry.autodiscover()
-            return registry.menus.keys()
+            return list(registry.menus.keys())
         except ImportError:
             return []
 
 
 class BasePagePrepareForm(BaseTargetFormMixin):
+    # pages tree is loaded lazily by levels (see BasePageAdmin.tree_view)
+    target_page = forms.ModelChoiceField(
+        queryset=None, required=False, widget=PageTreeWidget)
+
     class Meta:
         fields = ('target_type', 'target_page',)
         admin_fieldsets = [(None, {'fields': fields,})]
         admin_readonly_fields = ()
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # list only page types, which can be created somewhere in tree
+        content_types = ContentType.objects.get_for_models(
+            *self.Meta.model.get_page_type_availability().available,
+            for_concrete_models=False
+        )
+        self.fields['target_type'].queryset = ContentType.objects.filter(
+            id__in=[ct.id for model, ct in content_types.items()])
+
     def clean(self):
         cleaned_data = super().clean()
         cleaned_data = self.clean_target_fields(cleaned_data)
@@ -193,13 +274,72 @@ class BasePagePrepareForm(BaseTargetFormMixin):
 
 # Admin classes
 # -------------
+class PageChangeList(ChangeList):
+    """
+    Pages changelist with tree mode (if it is enabled in model admin and
+    there are no search and filters): root pages and children of expanded
+    page (tree_parent) and of each its ancestor are listed in tree order.
+    """
+
+    tree_mode = False
+    tree_parent = None
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(TREE_PARENT_VAR, None)
+        return params
+
+    def get_queryset(self, request):
+        self.tree_mode = (self.model_admin.tree_changelist and
+                          not self.query and not self.get_filters_params())
+        queryset = super().get_queryset(request)
+        if not self.tree_mode:
+            return queryset
+
+        parent = self.params.get(TREE_PARENT_VAR, '')
+        self.tree_parent = parent.isdigit() and self.model.get_base_model(
+            ).objects.filter(pk=parent).only('path', 'depth').first() or None
+        if self.tree_parent is None:
+            return queryset.filter(depth=1).annotate(
+                tree_expanded=Value(False, output_field=BooleanField()))
+
+        # children of each page in chain from root to expanded one
+        path, steplen = self.tree_parent.path, self.tree_parent.steplen
+        q = Q(depth=1)
+        for depth in range(1, self.tree_parent.depth + 1):
+            q |= Q(path__startswith=path[:depth * steplen], depth=depth + 1)
+
+        expanded = self.model.objects.ancestor_of_q(self.tree_parent,
+                                                    inclusive=True)
+        return queryset.filter(q).annotate(tree_expanded=Case(
+            When(expanded, then=Value(True)), default=Value(False),
+            output_field=BooleanField()))
+
+    def get_ordering(self, request, queryset):
+        if self.tree_mode:
+            return ['path']
+        return super().get_ordering(request, queryset)
+
+
 class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
     prepare_template = None
     prepare_form = BasePagePrepareForm
+    tree_page_size = 100
 
     prepopulated_fields = {'slug': ('title',)}
 
     form = BasePageForm
+    # reuse generated form classes (see get_form), fields querysets and
+    # widgets are built once with the first request, so enable it only if
+    # formfield_for_* methods do not depend on request (except permissions)
+    # or object
+    cache_form_classes = False
+
+    # tree changelist mode: only root pages are listed, children are
+    # expanded on demand (tree_toggle column), search and filters switch
+    # it to flat list, count of large lists is estimated or limited
+    tree_changelist = False
+
     fieldsets_dict = {
         'main': {
             'fields': (
@@ -242,6 +382,11 @@ class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
         'parent', 'content_type', 'owner', 'depth', 'path', 'numchild',
         'slug_path', 'url_path', 'active', 'date_create', 'date_update',)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # generated form classes, see get_form
+        self.form_classes = {}
+
     def check(self, **kwargs):
         errors = super().check(**kwargs)
         errors.extend(self._check_model_is_base_page(**kwargs))
@@ -271,6 +416,94 @@ class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
                 % (e, model.__name__,)
             ) if issubclass(model, BasePage) else e
 
+    actions = ['publish_pages', 'unpublish_pages']
+
+    def publish_pages(self, request, queryset):
+        count = queryset.publish()
+        self.message_user(request, _('%d page(s) published.') % count,
+                          messages.SUCCESS)
+    publish_pages.short_description = _('Publish selected pages')
+    publish_pages.allowed_permissions = ('change',)
+
+    def unpublish_pages(self, request, queryset):
+        count = queryset.unpublish()
+        self.message_user(request, _('%d page(s) unpublished.') % count,
+                          messages.SUCCESS)
+    unpublish_pages.short_description = _('Unpublish selected pages')
+    unpublish_pages.allowed_permissions = ('change',)
+
+    def get_changelist(self, request, **kwargs):
+        return PageChangeList
+
+    @property
+    def show_full_result_count(self):
+        return not self.tree_changelist
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        if self.tree_changelist and self.paginator is Paginator:
+            return EstimatedCountPaginator(
+                queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans,
+                                     allow_empty_first_page)
+
+    def get_form(self, request, obj=None, change=False, **kwargs):
+        """
+        Get form class, if cache_form_classes is set it is generated once
+        for each combination of fields, readonly fields and user permissions
+        (widgets of relation fields depend on them), so compiled fields of
+        form class are reused.
+        """
+        fields = kwargs.pop('fields', None)
+        if fields is None:
+            fields = flatten_fieldsets(self.get_fieldsets(request, obj))
+        if kwargs or not self.cache_form_classes:
+            # forms with custom factory arguments are not cached
+            return super().get_form(request, obj, change=change,
+                                    fields=fields, **kwargs)
+
+        user = getattr(request, 'user', None)
+        key = (
+            tuple(fields),
+            tuple(self.get_exclude(request, obj) or ()),
+            tuple(self.get_readonly_fields(request, obj)),
+            bool(change and user and
+                 not self.has_change_permission(request, obj)),
+            user and (user.is_superuser,
+                      frozenset(user.get_all_permissions())),
+        )
+        form = self.form_classes.get(key, None)
+        if form is None:
+            form = super().get_form(request, obj, change=change, fields=fields)
+            self.form_classes[key] = form
+        return form
+
+    def get_list_display(self, request):
+        list_display = super().get_list_display(request)
+        if self.tree_changelist:
+            list_display = ['tree_toggle'] + list(list_display)
+        return list_display
+
+    def get_list_display_links(self, request, list_display):
+        if self.tree_changelist and self.list_display_links == ():
+            return list_display[1:2]
+        return super().get_list_display_links(request, list_display)
+
+    def tree_toggle(self, obj):
+        indent = (obj.depth - 1) * 1.5
+        if getattr(obj, 'tree_expanded', False):
+            link = '?%s=%s' % (TREE_PARENT_VAR, obj.parent_id or '',)
+            return format_html('<a href="{}" style="margin-left: {}em">'
+                               '&minus;</a>', link, indent)
+        if obj.numchild:
+            link = '?%s=%s' % (TREE_PARENT_VAR, obj.pk,)
+            return format_html('<a href="{}" style="margin-left: {}em">'
+                               '+</a> <small>{}</small>', link, indent,
+                               obj.numchild)
+        return format_html('<span style="margin-left: {}em">&middot;</span>',
+                           indent)
+    tree_toggle.short_description = ''
+
     @csrf_protect_m
     def changelist_view(self, request, extra_context=None):
         e = request.GET.get(ERROR_FLAG, None)
@@ -288,17 +521,30 @@ class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
 
         base_model = self.model.get_base_model()
 
-        content_type = request.POST.get(
-            'target_type', request.GET.get('target_type', None)) or None
-        content_type = ContentType.objects.filter(id=content_type).first()
-
-        parent_id = request.POST.get(
-            'target_page', request.GET.get('target_page', None)) or None
-        parent = base_model.objects.filter(id=parent_id).first()
-        parent = parent.specific if parent else None
-
         msg, url = None, None
         if not object_id:
+            content_type = request.POST.get(
+                'target_type', request.GET.get('target_type', None)) or None
+            try:
+                content_type = content_type and ContentType.objects.get_for_id(
+                    content_type)
+            except (ContentType.DoesNotExist, ValueError):
+                content_type = None
+
+            # only parent's type is required for availability check
+            parent_id = request.POST.get(
+                'target_page', request.GET.get('target_page', None)) or None
+            try:
+                parent = parent_id and base_model.objects.filter(
+                    id=parent_id).first()
+            except (ValueError, ValidationError):
+                parent = None
+
+            reason = None
+            if content_type and not (parent_id and not parent):
+                reason = base_model.get_page_type_availability(
+                    parent).get_reason(content_type.model_class())
+
             if not content_type:
                 url = '%s?target_type=%s' % (
                     self.get_admin_url_for_model(base_model, 'prepare'),
@@ -318,18 +564,17 @@ class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
                 url = '%s?target_type=%s' % (
                     self.get_admin_url_for_model(base_model, 'prepare'),
                     content_type.id)
-            elif parent and not self.model.can_create_at(parent):
+            elif reason == PARENT_NOT_ALLOWED:
                 msg = _('Page type "%s" can not be created in "%s" parent'
                         ' page.') % (self.model.__name__, parent,)
                 url = '%s?target_type=%s' % (
                     self.get_admin_url_for_model(base_model, 'prepare'),
                     content_type.id)
-            elif not content_type.model_class().is_creatable:
+            elif reason == NOT_CREATABLE:
                 msg = _('Page type "%s" can not be created manually'
                         ' in admin interface.') % content_type
                 url = self.get_admin_url_for_model(base_model, 'prepare')
-            elif (self.model.max_count and
-                    self.model.objects.count() >= self.model.max_count):
+            elif reason == MAX_COUNT_REACHED:
                 msg = _('Page type "%s" exceeded max_count instances limit'
                         ' (%d).') % (self.model.__name__, self.model.max_count,)
                 url = self.get_admin_url_for_model(base_model, 'prepare')
@@ -375,6 +620,8 @@ class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
             my_urls = [
                 path('prepare/', wrap(self.prepare_view),
                      name='%s_%s_prepare' % info),
+                path('tree/', wrap(self.tree_view),
+                     name='%s_%s_tree' % info),
             ]
             urls = my_urls + urls
 
@@ -390,6 +637,9 @@ class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
 
         Form = modelform_factory(base_model, form=self.prepare_form)
         form = Form(request.POST or None, initial=request.GET)
+        widget = form.fields['target_page'].widget
+        if isinstance(widget, PageTreeWidget):
+            widget.tree_url = self.get_admin_url_for_model(base_model, 'tree')
         if form.is_valid():
             tt = form.cleaned_data.get('target_type')
             tp = form.cleaned_data.get('target_page', None)
@@ -423,17 +673,45 @@ class BasePageAdmin(FieldsetsDictMixin, admin.ModelAdmin):
             "admin/prepare_form.html"
         ], context)
 
+    def tree_view(self, request):
+        """
+        JSON list of children of "parent" page (root pages if it is empty),
+        paged by "offset" value, used by lazy pages tree widget.
+        """
+        if not (self.has_view_permission(request) or
+                self.has_add_permission(request)):
+            raise PermissionDenied
+
+        base_model = self.model.get_base_model()
+        parent = request.GET.get('parent', '')
+        offset = request.GET.get('offset', '0')
+        offset = int(offset) if offset.isdigit() else 0
+        size = self.tree_page_size
+
+        queryset = base_model.objects.filter(depth=1)
+        if parent:
+            parent = parent.isdigit() and base_model.objects.filter(
+                pk=parent).only('path', 'depth').first()
+            if not parent:
+                raise Http404('Parent page does not exist.')
+            queryset = base_model.objects.child_of(parent)
+
+        pages = list(queryset.order_by('path').only(
+            'title', 'content_type', 'numchild')[offset:offset + size + 1])
+        return JsonResponse({
+            'results': [{
+                'id': page.pk,
+                'label': '%s (%s)' % (page, page.specific_class.__name__,),
+                'numchild': page.numchild,
+            } for page in pages[:size]],
+            'next': offset + size if len(pages) > size else None,
+        })
+
     def save_model(self, request, obj, form, change):
         if obj.pk is None:
-            # TreeBeard api requires reloading new model from db after adding
-            page = type(obj).add_root(instance=obj)
-            page = type(obj).objects.filter(pk=page.pk).first()
-            page.owner = request.user
-            page.save(update_fields=['owner'])
-
-            parent = form.cleaned_data.get('target_page', None)
-            if parent:
-                page.move(type(parent).objects.filter(pk=parent.pk).first(),
-                          'last-child')
+            # insert page directly into target position with one query
+            obj.owner = request.user
+            type(obj).objects.insert(
+                obj, form.cleaned_data.get('target_page', None), 'last-child')
         else:
             obj.save()
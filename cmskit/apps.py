@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CMSKitConfig(AppConfig):
+    name = 'cmskit'
+    verbose_name = 'CMSKit'
+
+    def ready(self):
+        from .models.constraints import build_page_type_constraints
+        build_page_type_constraints()
@@ -34,3 +34,16 @@ DEFAULT_TEMPLATES = (
 )
 
 TEMPLATES = getattr(settings, 'CMSKIT_TEMPLATES', DEFAULT_TEMPLATES)
+
+# cache settings (used for menus, fragments and other cached data)
+CACHE_ALIAS = getattr(settings, 'CMSKIT_CACHE_ALIAS', 'default')
+CACHE_PREFIX = getattr(settings, 'CMSKIT_CACHE_PREFIX', 'cmskit')
+CACHE_TIMEOUT = getattr(settings, 'CMSKIT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+# search settings (see contrib.search app): backend class path (default is
+# chosen by database vendor) and postgresql text search configuration
+SEARCH_BACKEND = getattr(settings, 'CMSKIT_SEARCH_BACKEND', None)
+SEARCH_CONFIG = getattr(settings, 'CMSKIT_SEARCH_CONFIG', 'simple')
+
+# areas settings (see contrib.areas app): concrete area model
+AREAS_MODEL = getattr(settings, 'CMSKIT_AREAS_MODEL', None)
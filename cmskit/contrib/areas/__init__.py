@@ -1,6 +1,3 @@
 # todo:
 #     areas in nodes
-#     areas in models
 #     post requests processing (optional)
-#     middleware
-#     caching
@@ -0,0 +1,34 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+from django.contrib import admin
+from cmskit.utils.admin import FieldsetsDictMixin
+from .models import get_area_choices
+
+
+class BaseAreaAdmin(FieldsetsDictMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'id', 'area', 'page', 'weight', 'active',
+                    'inherit',)
+    list_filter = ('area', 'active', 'inherit',)
+    ordering = ('area', 'weight',)
+    search_fields = ('title',)
+    readonly_fields = ('date_create', 'date_update',)
+    fieldsets_dict = {
+        'main': {
+            'fields': (
+                ('page', 'area',), 'title', 'text',
+                ('weight', 'active', 'inherit',),
+            ),
+        },
+        'readonly': {
+            'title': _('Readonly fields'),
+            'classes': ('collapse',),
+            'fields': ('date_create', 'date_update',),
+        },
+    }
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        if db_field.name == 'area':
+            return forms.ChoiceField(
+                label=db_field.verbose_name.capitalize(),
+                choices=get_area_choices())
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
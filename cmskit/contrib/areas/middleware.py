@@ -0,0 +1,48 @@
+from django.utils.deprecation import MiddlewareMixin
+from .models import get_area_model
+
+
+class Areas(object):
+    """
+    Lazy rendered areas of current page (request.current_page, set by
+    PageView), loaded on first access: {{ areas.sidebar }} in templates
+    or request.areas['sidebar'] in code, empty for unknown areas.
+    """
+
+    def __init__(self, request, model):
+        self.request = request
+        self.model = model
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            page = getattr(self.request, 'current_page', None)
+            self._data = {} if page is None else (
+                self.model.get_rendered_areas(page))
+        return self._data
+
+    def __getitem__(self, name):
+        return self.data.get(name, '')
+
+    def __contains__(self, name):
+        return name in self.data
+
+    def __iter__(self):
+        return iter(self.data)
+
+
+class AreasMiddleware(MiddlewareMixin):
+    """
+    Set lazy request.areas and put it into context of template responses
+    as "areas" variable (if it is not defined by view).
+    """
+
+    def process_request(self, request):
+        request.areas = Areas(request, get_area_model())
+
+    def process_template_response(self, request, response):
+        if response.context_data is None:
+            response.context_data = {}
+        response.context_data.setdefault('areas', request.areas)
+        return response
@@ -1,26 +1,163 @@
-class Area(models.Model):
-    def get_content(self):
-        pass
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils.translation import gettext_lazy as _
+from cmskit import conf
+from cmskit.utils import resolve_model_string
+from cmskit.utils.cache import (get_cache, make_key, get_version,
+                                bump_version_on_commit)
 
 
-class Areas:
-    data = None
+def get_template_areas(code):
+    """
+    Get areas ((name, title), ...) of base template by its code,
+    empty code means the first (default) template.
+    """
+    for template in conf.TEMPLATES:
+        if not code or template['code'] == code:
+            return tuple(template.get('areas', ()))
+    return ()
 
-    def getattr(self):
-        pass
 
+def get_area_choices():
+    """Get unique areas of all base templates as choices."""
+    choices = {}
+    for template in conf.TEMPLATES:
+        for name, title in template.get('areas', ()):
+            choices.setdefault(name, title)
+    return list(choices.items())
 
-class Area:
-    place = None
 
-    def __init__(self, place, **kwargs):
-        self.place = place
+def get_area_model():
+    if not conf.AREAS_MODEL:
+        raise ImproperlyConfigured(
+            'CMSKIT_AREAS_MODEL setting is required by areas app.')
+    return resolve_model_string(conf.AREAS_MODEL)
 
-    def get_content(self):
-        pass
 
-    def process_request(self, request):
-        pass
+class BaseArea(models.Model):
+    """
+    A content of named page area (see "areas" of base templates), shown
+    on page and on its descendants (if inherit), which have no own content
+    in the same area.
+    """
 
-    def process_response(self, request, response):
-        pass
+    # page = models.ForeignKey(
+    #     Page, on_delete=models.CASCADE,
+    #     related_name='areas', verbose_name=_('page'))
+
+    area = models.CharField(_('area'), max_length=64, db_index=True)
+    active = models.BooleanField(_('is active'), default=True)
+    inherit = models.BooleanField(
+        _('inherit'), default=True, help_text=_(
+            'Show content on descendant pages, which have no own content'
+            ' in this area.'
+        ))
+
+    title = models.CharField(_('name'), max_length=255, blank=True)
+    text = models.TextField(_('text'), max_length=1024*200, blank=True)
+
+    weight = models.IntegerField(_('sorting weight'), default=500)
+
+    # stat info
+    date_create = models.DateTimeField(editable=False, auto_now_add=True)
+    date_update = models.DateTimeField(editable=False, auto_now=True)
+
+    template_name_prefix = 'areas'
+
+    class Meta:
+        verbose_name = _('area')
+        verbose_name_plural = _('areas')
+        ordering = ('area', 'weight', 'id',)
+        abstract = True
+
+    def __str__(self):
+        return self.title or self.area
+
+    @transaction.atomic
+    def save(self, **kwargs):
+        super().save(**kwargs)
+        type(self).invalidate_areas()
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        type(self).invalidate_areas()
+        return result
+
+    # areas version section
+    @classmethod
+    def get_areas_version_name(cls):
+        return 'areas:%s' % cls._meta.label_lower
+
+    @classmethod
+    def get_areas_version(cls):
+        """
+        Return version of all areas contents, it changes on any area save
+        or delete (inherited contents make pages depend on each other).
+        """
+        return get_version(cls.get_areas_version_name())
+
+    @classmethod
+    def invalidate_areas(cls):
+        bump_version_on_commit(cls.get_areas_version_name())
+
+    # loading and rendering section
+    @classmethod
+    def get_page_areas(cls, page):
+        """
+        Get {area name: [area, ...]} of page's base template areas in one
+        query: own contents of page or inherited contents of the nearest
+        ancestor, which has them.
+        """
+        names = [name for name, title in
+                 get_template_areas(page.base_template)]
+        if not names:
+            return {}
+
+        steplen = page.steplen
+        paths = [page.path[:i * steplen] for i in range(1, page.depth)]
+        queryset = (
+            cls.objects.filter(Q(page_id=page.pk) |
+                               Q(page__path__in=paths, inherit=True),
+                               area__in=names, active=True)
+                       .annotate(page_depth=F('page__depth'))
+                       .order_by('-page_depth', 'weight', 'id'))
+
+        areas, depths = {name: [] for name in names}, {}
+        for area in queryset:
+            # areas are ordered from the deepest page to root
+            depth = depths.setdefault(area.area, area.page_depth)
+            if depth == area.page_depth:
+                areas[area.area].append(area)
+        return areas
+
+    @classmethod
+    def get_template_names(cls, name):
+        return ['%s/%s.html' % (cls.template_name_prefix, name),
+                '%s/area.html' % cls.template_name_prefix]
+
+    @classmethod
+    def render_area(cls, page, name, areas):
+        return render_to_string(cls.get_template_names(name), {
+            'page': page, 'name': name, 'areas': areas,
+        })
+
+    @classmethod
+    def get_rendered_areas(cls, page):
+        """
+        Get {area name: html} of page, rendered fragments of all areas are
+        cached together per areas and tree versions.
+        """
+        cache, key = get_cache(), make_key(
+            'areas', cls._meta.label_lower, cls.get_areas_version(),
+            page.get_tree_version(), page.pk)
+        rendered = cache.get(key)
+        if rendered is None:
+            rendered = {
+                name: cls.render_area(page, name, areas) if areas else ''
+                for name, areas in cls.get_page_areas(page).items()
+            }
+            cache.set(key, rendered, conf.CACHE_TIMEOUT)
+        return rendered
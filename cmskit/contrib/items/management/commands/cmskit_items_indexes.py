@@ -0,0 +1,131 @@
+import hashlib
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections, migrations, models, router
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from cmskit.contrib.items.models import BaseItem
+
+
+class Command(BaseCommand):
+    help = ('Suggest (and optionally generate migrations with) composite'
+            ' indexes for items lists, based on orderings and filters'
+            ' actually configured on pages with items.')
+
+    # equality filtered columns of each items list query
+    prefix_fields = ('page', 'active', 'visible',)
+    # equality filtered columns of date filters (precomputed date states)
+    filter_date_fields = {
+        'date_actual': ('date_started',),
+        'date_actual_both': ('date_started', 'date_ended',),
+        'date_anounce': ('date_started',),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--write', action='store_true',
+            help='Write migrations with missing indexes into items apps.')
+        parser.add_argument(
+            '--database', default='default',
+            help='Database to check existing indexes in.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+
+        for model in apps.get_models():
+            if not issubclass(model, BaseItem) or model._meta.proxy:
+                continue
+            if not router.allow_migrate_model(options['database'], model):
+                continue
+
+            existing = self.get_existing_indexes(connection, model)
+            indexes = [i for i in self.get_indexes(model)
+                       if self.get_signature(model, i.fields) not in existing]
+
+            if not indexes:
+                self.stdout.write('%s: no missing indexes.' % model._meta.label)
+                continue
+
+            self.stdout.write('%s: missing indexes:' % model._meta.label)
+            for index in indexes:
+                self.stdout.write('    models.Index(fields=%r, name=%r)' % (
+                    index.fields, index.name,))
+
+            if options['write']:
+                path = self.write_migration(model, indexes)
+                self.stdout.write('    migration written: %s' % path)
+
+    def get_orderings(self, model):
+        """Get all distinct item page configurations for items model."""
+        page_model = model._meta.get_field('page').related_model
+        values = (page_model.objects.order_by()
+                            .values_list('order_by', 'filter_date').distinct())
+        for order_by, filter_date in values:
+            page = page_model(order_by=order_by, filter_date=filter_date)
+            yield page.get_order_by(), filter_date
+
+    def get_indexes(self, model):
+        indexes, signatures = [], set()
+        for order_by, filter_date in self.get_orderings(model):
+            order_by = list(order_by)
+            if not any(i.lstrip('-') == 'id' for i in order_by):
+                order_by.append('-id')
+
+            fields = (list(self.prefix_fields) +
+                      list(self.filter_date_fields.get(filter_date, ())) +
+                      order_by)
+            signature = self.get_signature(model, fields)
+            if signature not in signatures:
+                signatures.add(signature)
+                indexes.append(models.Index(
+                    fields=fields, name=self.get_name(model, fields)))
+        return indexes
+
+    def get_signature(self, model, fields):
+        return tuple(
+            (model._meta.get_field(i.lstrip('-')).column,
+             'DESC' if i.startswith('-') else 'ASC',) for i in fields
+        )
+
+    def get_name(self, model, fields):
+        digest = hashlib.md5(','.join(fields).encode('utf-8')).hexdigest()
+        return '%s_%s' % (model._meta.db_table[:19], digest[:10],)
+
+    def get_existing_indexes(self, connection, model):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, model._meta.db_table)
+        return {
+            tuple(zip(data['columns'],
+                      data.get('orders') or ['ASC'] * len(data['columns'])))
+            for data in constraints.values() if data['index']
+        }
+
+    def write_migration(self, model, indexes):
+        """
+        Write migration with indexes into the model's app. Indexes are added
+        only to database (not to migrations state), because they depend on
+        data, not on model definition, so makemigrations will never try
+        to remove them.
+        """
+        app_label = model._meta.app_label
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        leaves = loader.graph.leaf_nodes(app_label)
+        number = max([MigrationAutodetector.parse_number(name) or 0
+                      for app, name in leaves] or [0]) + 1
+
+        migration = migrations.Migration(
+            '%04d_cmskit_items_indexes' % number, app_label)
+        migration.dependencies = leaves
+        migration.operations = [
+            migrations.SeparateDatabaseAndState(database_operations=[
+                migrations.AddIndex(model_name=model._meta.model_name,
+                                    index=index) for index in indexes
+            ]),
+        ]
+
+        writer = MigrationWriter(migration)
+        with open(writer.path, 'w', encoding='utf-8') as migration_file:
+            migration_file.write(writer.as_string())
+        return writer.path
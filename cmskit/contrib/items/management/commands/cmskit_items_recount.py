@@ -0,0 +1,30 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from cmskit.contrib.items.models import BaseItemPage
+
+
+class Command(BaseCommand):
+    help = ('Reconcile stored items counts of all pages with items'
+            ' (BaseItemPage subclasses) with actual values.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Count of pages loaded from database at once.')
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if not issubclass(model, BaseItemPage) or model._meta.proxy:
+                continue
+
+            total, updated = 0, 0
+            pages = model.objects.order_by('pk').iterator(
+                chunk_size=options['batch_size'])
+            for page in pages:
+                count = page.items_count
+                page.update_items_count()
+                total += 1
+                updated += count != page.items_count
+
+            self.stdout.write('%s: %d pages checked, %d updated.' % (
+                model._meta.label, total, updated,))
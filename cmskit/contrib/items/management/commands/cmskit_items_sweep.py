@@ -0,0 +1,26 @@
+import datetime
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from cmskit.contrib.items.models import BaseItem
+
+
+class Command(BaseCommand):
+    help = ('Update precomputed date states of items, which start or end'
+            ' dates are passed, should be run periodically (e.g. by cron).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute date states of all items (e.g. after migration).')
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if not issubclass(model, BaseItem) or model._meta.proxy:
+                continue
+
+            boundary = model.sweep_date_states(full=options['full'])
+            boundary = boundary and datetime.datetime.fromtimestamp(
+                boundary, tz=timezone.utc)
+            self.stdout.write('%s: next boundary is %s.' % (
+                model._meta.label, boundary or 'not defined',))
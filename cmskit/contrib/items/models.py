@@ -1,9 +1,17 @@
 import logging
+import datetime
+from django.apps import apps
 from django.db import models
-from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.db import models, transaction
+from django.db.models import functions
+from cmskit import conf
+from cmskit.models.query import subtrees_q
+from cmskit.signals import pages_published_changed
+from cmskit.utils.cache import (get_cache, make_key, get_version,
+                                bump_version_on_commit)
+from cmskit.utils.urls import page_url_builder
 from .query import ItemManager
 
 
@@ -27,6 +35,9 @@ class BaseItemPage(models.Model):
         ('date_anounce', 'anounce (date < date_start)'),
     )
     FILTER_FIELDS = ('filter', 'filter_date',)
+    # filters, which results depend on current time (can not be counted once),
+    # builtin date filters use precomputed items date states (see BaseItem)
+    FILTER_TIME_DEPENDENT_FIELDS = ()
     ORDER_BY_DEFAULT = ('-date_start', '-weight', '-id',)
 
     # behaviour
@@ -47,21 +58,38 @@ class BaseItemPage(models.Model):
         _('onpage'), default=10,
         help_text=_('Perpage count (default=10, 1<=count<=999).'))
 
+    items_count = models.PositiveIntegerField(
+        _('items count'), default=0, editable=False, help_text=_(
+            'Count of active visible filtered items, time dependent'
+            ' filters are not applied.'))
+
     class Meta:
         verbose_name = _('Page with items')
         verbose_name_plural = _('Pages with items')
         abstract = True
 
     def get_order_by(self):
-        fields = [i.name for i in self.items.model._meta.fields]
+        fields = [i.name for i in self.get_item_model()._meta.fields]
         order_by = [i for i in self.order_by.split(' ')
                     if i.replace('-', '', 1) in fields] if self.order_by else []
         order_by = order_by or self.ORDER_BY_DEFAULT
         return order_by
 
+    def save(self, **kwargs):
+        # filters may be changed, so recount items of existing page
+        if self.pk:
+            self.items_count = self.count_items()
+        super().save(**kwargs)
+        self.invalidate_items()
+
     def page_is_moved_handler(self):
-        for item in self.items.all():
-            item.save()
+        # update items active state and url paths with one query instead
+        # of saving each item, values are the same as BaseItem.save sets
+        self.items.update(
+            active=(models.F('published') if self.active else False),
+            url_path=(functions.Concat(models.Value('%s/' % self.url_path),
+                                       'slug') if self.url_path else None))
+        self.get_item_model().items_changed({self.pk})
 
     @classmethod
     def get_item_model(cls):
@@ -73,10 +101,110 @@ class BaseItemPage(models.Model):
                     .filter(self.get_filter())
                     .order_by(*self.get_order_by()))
 
+    # items version section
+    @classmethod
+    def get_items_version_name(cls, pk):
+        return 'items:%s:%s' % (cls._meta.label_lower, pk,)
+
+    def get_items_version(self):
+        """
+        Return version of page items list, it changes on any item save or
+        delete and page save and may be used as a part of cache keys.
+        """
+        return get_version(self.get_items_version_name(self.pk))
+
+    def invalidate_items(self):
+        bump_version_on_commit(self.get_items_version_name(self.pk))
+
+    # archive section
+    def get_archive(self):
+        """
+        Get date archive of visible items as list of (year, month, count)
+        tuples (newest first), grouped by date_start month in one query,
+        result is cached per items version and current time zone.
+        """
+        cache = get_cache()
+        key = make_key('items', 'archive', self._meta.label_lower, self.pk,
+                       self.get_items_version(),
+                       timezone.get_current_timezone_name())
+        archive = cache.get(key)
+        if archive is None:
+            queryset = (self.get_item_queryset().visible()
+                            .filter(date_start__isnull=False)
+                            .annotate(month=functions.TruncMonth('date_start'))
+                            .order_by('-month').values('month')
+                            .annotate(count=models.Count('pk'))
+                            .values_list('month', 'count'))
+            archive = [(month.year, month.month, count,)
+                       for month, count in queryset]
+            cache.set(key, archive, conf.CACHE_TIMEOUT)
+        return archive
+
+    def get_archive_range(self, year, month=None):
+        """Get [start, end) datetime range of archive year or month."""
+        start = datetime.datetime(year, month or 1, 1)
+        if month is None or month == 12:
+            end = datetime.datetime(year + 1, 1, 1)
+        else:
+            end = datetime.datetime(year, month + 1, 1)
+        if timezone.is_naive(timezone.now()):
+            return start, end
+        return timezone.make_aware(start), timezone.make_aware(end)
+
+    def get_archive_filter(self, year, month=None):
+        start, end = self.get_archive_range(year, month)
+        return models.Q(date_start__gte=start, date_start__lt=end)
+
+    def archive_exists(self, year, month=None):
+        return any(i[0] == year and (month is None or i[1] == month)
+                   for i in self.get_archive())
+
+    def get_archive_url(self, year, month=None):
+        if not self.url_path:
+            return None
+        path = '%s/%04d' % (self.url_path, year,)
+        path = '%s/%02d' % (path, month,) if month else path
+        return page_url_builder.get_url_for_path(type(self), path)
+
+    # items count section
+    def count_items(self):
+        """Count active visible filtered items (except time dependent)."""
+        fields = [i for i in self.FILTER_FIELDS
+                  if i not in self.FILTER_TIME_DEPENDENT_FIELDS]
+        return (self.get_item_model().objects.active().visible()
+                    .filter(self.get_filter(fields)).count())
+
+    def items_count_is_exact(self):
+        return not any(getattr(self, i)
+                       for i in self.FILTER_TIME_DEPENDENT_FIELDS)
+
+    def get_items_count(self):
+        """
+        Get count of visible items in list, stored value is used if no
+        time dependent filter is set, else items are counted exactly.
+        """
+        if self.items_count_is_exact():
+            return self.items_count
+        return self.get_item_queryset().visible().count()
+
+    @transaction.atomic
+    def update_items_count(self):
+        """Recount and store items count without saving whole page."""
+        model = type(self)
+        # lock page row, so concurrent recounts are serialized and
+        # each one sees changes of previously committed transaction
+        list(model.objects.select_for_update()
+                  .filter(pk=self.pk).values_list('pk', flat=True))
+        count = self.count_items()
+        if model.objects.filter(pk=self.pk).exclude(
+                items_count=count).update(items_count=count):
+            self.invalidate_items()
+        self.items_count = count
+
     # filter section
-    def get_filter(self):
+    def get_filter(self, fields=None):
         filter = models.Q(page=self)
-        for field in self.FILTER_FIELDS:
+        for field in self.FILTER_FIELDS if fields is None else fields:
             method = getattr(self, 'filter_%s' % getattr(self, field), None)
             if method and callable(method):
                 filter &= method(filter)
@@ -86,17 +214,13 @@ class BaseItemPage(models.Model):
         return models.Q(date_start__isnull=False)
 
     def filter_date_actual(self, filter):
-        return models.Q(models.Q(date_start__lte=timezone.now()) |
-                        models.Q(date_start__isnull=True))
+        return models.Q(date_started=True)
 
     def filter_date_actual_both(self, filter):
-        return models.Q(models.Q(date_start__lte=timezone.now()) |
-                        models.Q(date_start__isnull=True),
-                        models.Q(date_end__gte=timezone.now()) |
-                        models.Q(date_end__isnull=True))
+        return models.Q(date_started=True, date_ended=False)
 
     def filter_date_anounce(self, filter):
-        return models.Q(date_start__gte=timezone.now())
+        return models.Q(date_started=False)
 
 
 class BaseItem(models.Model):
@@ -123,9 +247,22 @@ class BaseItem(models.Model):
     date_end = models.DateTimeField(
         _('end date'), blank=True, null=True, db_index=True)
 
+    # precomputed date states, updated on save and by cmskit_items_sweep
+    # command, so date filtered queries do not depend on current time
+    date_started = models.BooleanField(
+        _('is started'), default=True, editable=False, db_index=True,
+        help_text=_('Start date is empty or passed.'))
+    date_ended = models.BooleanField(
+        _('is ended'), default=False, editable=False, db_index=True,
+        help_text=_('End date is set and passed.'))
+
     # path
     slug = models.SlugField(_('slug'), max_length=255, db_index=True)
     url = models.CharField(_('url'), max_length=512, blank=True)
+    url_path = models.CharField(
+        _('url path'), max_length=1280, null=True, db_index=True,
+        editable=False, default=None,
+        help_text='Automatically generated, None value means inaccessibility.')
 
     weight = models.IntegerField(_('sorting weight'), default=500)
 
@@ -166,12 +303,11 @@ class BaseItem(models.Model):
         if use_url and self.url:
             return self.url
 
-        meta = self.page.get_base_model()._meta
-        path, url = self.page.get_path_or_url()
-        view_name = self.page.view_name.format(app_label=meta.app_label,
-                                               model_name=meta.model_name)
-        path = '%s/%s' % (path, self.slug,) if path else '/404/'
-        return reverse(view_name, kwargs={'path': path,})
+        # reverse-free url, built from stored url_path value (or computed
+        # one, if it is not filled yet, see FillItemsUrlPaths operation)
+        return page_url_builder.get_url_for_path(
+            self._meta.get_field('page').related_model,
+            self.url_path or self.get_url_path() or '/404/')
 
     def get_absolute_url_real(self):
         return self.get_absolute_url(use_url=False)
@@ -179,7 +315,136 @@ class BaseItem(models.Model):
     def get_active(self):
         return self.published and self.page.active
 
+    def get_url_path(self):
+        path = self.page.url_path
+        return '%s/%s' % (path, self.slug,) if path else None
+
     @transaction.atomic
     def save(self, **kwargs):
+        update_counters = kwargs.pop('update_counters', True)
+        page_id = self.pk and (
+            type(self).objects.filter(pk=self.pk)
+                              .values_list('page_id', flat=True).first())
+
         self.active = self.get_active()
+        self.url_path = self.get_url_path()
+        self.date_started, self.date_ended = self.get_date_states()
         super().save(**kwargs)
+
+        self.invalidate_pages(page_id)
+        if update_counters:
+            self.update_page_counters(page_id)
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.invalidate_pages()
+        self.update_page_counters()
+        return result
+
+    def invalidate_pages(self, previous_page_id=None):
+        """Bump items version of page (and previous one if item is moved)."""
+        type(self).items_changed({self.page_id, previous_page_id},
+                                 recount=False)
+
+    @classmethod
+    def items_changed(cls, page_ids, recount=True):
+        """
+        Handle change of items of pages (item saved or deleted, items
+        deleted or updated in bulk): bump items versions of pages and
+        recount their stored items counts (if recount).
+        """
+        page_model = cls._meta.get_field('page').related_model
+        page_ids = set(page_ids) - {None}
+        for page_id in page_ids:
+            bump_version_on_commit(
+                page_model.get_items_version_name(page_id))
+        if recount and page_ids:
+            for page in page_model.objects.filter(pk__in=page_ids):
+                page.update_items_count()
+
+    def update_page_counters(self, previous_page_id=None):
+        self.page.update_items_count()
+        if previous_page_id and previous_page_id != self.page_id:
+            page_model = self._meta.get_field('page').related_model
+            page = page_model.objects.filter(pk=previous_page_id).first()
+            page and page.update_items_count()
+
+    # date states section
+    def get_date_states(self, now=None):
+        now = now or timezone.now()
+        return (self.date_start is None or self.date_start <= now,
+                self.date_end is not None and self.date_end < now,)
+
+    @classmethod
+    @transaction.atomic
+    def sweep_date_states(cls, full=False):
+        """
+        Update date states of items, which dates boundaries are passed
+        (all items if full), recount affected pages (see cmskit_items_sweep
+        command, requests never sweep). Return the next boundary timestamp
+        or None.
+        """
+        now, queryset = timezone.now(), cls._base_manager.all()
+        started = models.Q(date_start__isnull=True) | models.Q(
+            date_start__lte=now)
+        ended = models.Q(date_end__isnull=False, date_end__lt=now)
+
+        updates = [
+            (queryset.filter(started, date_started=False),
+             {'date_started': True}),
+            (queryset.filter(ended, date_ended=False),
+             {'date_ended': True}),
+        ]
+        if full:
+            updates += [
+                (queryset.exclude(started).filter(date_started=True),
+                 {'date_started': False}),
+                (queryset.exclude(ended).filter(date_ended=True),
+                 {'date_ended': False}),
+            ]
+
+        page_ids = set()
+        for items, values in updates:
+            page_ids.update(items.values_list('page_id', flat=True))
+            items.update(**values)
+
+        # items versions (list and archive caches) and counts of pages
+        cls.items_changed(page_ids)
+
+        boundaries = queryset.aggregate(
+            start=models.Min('date_start', filter=models.Q(
+                date_started=False)),
+            end=models.Min('date_end', filter=models.Q(
+                date_ended=False, date_end__isnull=False)))
+        boundaries = [i for i in boundaries.values() if i is not None]
+        return min(boundaries).timestamp() if boundaries else None
+
+
+def pages_published_changed_handler(sender, paths, **kwargs):
+    """
+    Update items active states, counts and versions of item pages in
+    subtrees, changed by bulk publish or unpublish (see cmskit.signals).
+    """
+    for model in apps.get_models():
+        if not issubclass(model, BaseItem) or model._meta.proxy:
+            continue
+        page_model = model._meta.get_field('page').related_model
+        if not issubclass(page_model, sender):
+            continue
+
+        # items active state is the same as BaseItem.get_active returns
+        items = model._base_manager.filter(subtrees_q(paths, 'page__'))
+        items.filter(page__active=False).exclude(
+            active=False).update(active=False)
+        items.filter(page__active=True).exclude(
+            active=models.F('published')).update(
+            active=models.F('published'))
+
+        pages = page_model._base_manager.filter(subtrees_q(paths))
+        model.items_changed(pages.values_list('pk', flat=True))
+
+
+pages_published_changed.connect(
+    pages_published_changed_handler,
+    dispatch_uid='cmskit_items_pages_published_changed')
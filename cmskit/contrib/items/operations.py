@@ -0,0 +1,64 @@
+from django.apps import apps as global_apps
+from django.db import migrations
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+
+class RecountItems(migrations.RunPython):
+    """
+    Data migration operation, which stores actual items counts of pages
+    with items (until it is done, stored zero counts are checked by views),
+    add it to migration after the one, which adds items_count field:
+
+        operations = [RecountItems('news.NewsPage')]
+
+    Items filters are defined by page model methods, so current model
+    class is used, not the historical one.
+    """
+
+    def __init__(self, page_model, **kwargs):
+        self.page_model = page_model
+        super().__init__(self.recount, migrations.RunPython.noop, **kwargs)
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.page_model], {})
+
+    def describe(self):
+        return 'Recount items of %s pages' % self.page_model
+
+    def recount(self, apps, schema_editor):
+        model = global_apps.get_model(self.page_model)
+        for page in model.objects.order_by('pk').iterator():
+            page.update_items_count()
+
+
+class FillItemsUrlPaths(migrations.RunPython):
+    """
+    Data migration operation, which fills not filled url_path values of
+    items with one UPDATE query (until it is done, views find such items
+    by slug), add it to migration after the one, which adds url_path field:
+
+        operations = [FillItemsUrlPaths('news.NewsItem')]
+    """
+
+    def __init__(self, item_model, **kwargs):
+        self.item_model = item_model
+        super().__init__(self.fill, migrations.RunPython.noop, **kwargs)
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.item_model], {})
+
+    def describe(self):
+        return 'Fill url paths of %s items' % self.item_model
+
+    def fill(self, apps, schema_editor):
+        model = apps.get_model(self.item_model)
+        page_model = model._meta.get_field('page').related_model
+        page_url_path = page_model._base_manager.filter(
+            pk=OuterRef('page_id')).values('url_path')[:1]
+        (model._base_manager.using(schema_editor.connection.alias)
+                            .filter(url_path__isnull=True,
+                                    page__url_path__gt='')
+                            .update(url_path=Concat(
+                                Subquery(page_url_path), Value('/'), 'slug',
+                                output_field=CharField())))
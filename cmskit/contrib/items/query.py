@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class ItemQuerySet(models.QuerySet):
@@ -8,6 +8,18 @@ class ItemQuerySet(models.QuerySet):
     def visible(self):
         return self.filter(visible=True)
 
+    def delete(self):
+        # bulk delete (e.g. admin "delete selected" action) changes items
+        # of pages as well as BaseItem.delete does (see items_changed)
+        with transaction.atomic(using=self.db, savepoint=False):
+            page_ids = set(self.values_list('page_id', flat=True))
+            result = super().delete()
+            self.model.items_changed(page_ids)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class ItemManager(models.Manager):
     queryset_class = ItemQuerySet
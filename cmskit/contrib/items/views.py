@@ -1,8 +1,17 @@
+import hashlib
+from urllib.parse import urlencode
+from django.db.models import Q
 from django.http import HttpResponseRedirect
-from django.core.paginator import Paginator, InvalidPage, EmptyPage
+from django.core.paginator import InvalidPage, EmptyPage
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from cmskit import conf
 from cmskit.utils import jump_node_by_node
-from cmskit.utils.pagination import Pagination
+from cmskit.utils.cache import get_cache, make_key
+from cmskit.utils.pagination import (Paginator, Pagination,
+                                     KeysetPaginator, KeysetPagination)
 from cmskit.utils.querystring import QueryString
 from cmskit.views import PageView
 
@@ -13,12 +22,54 @@ class ItemPageView(PageView):
     queryset_item = None
     extra_context = {}
     pagination = Pagination
+    list_template_type = 'list'
+
+    # rendered list fragment cache (see nodes/list_items.html template),
+    # invalidated by items version of node (any item save or delete)
+    list_cache = False
+    list_cache_timeout = conf.CACHE_TIMEOUT
+    list_fragment_template_type = 'list_items'
+
+    # date archive urls: "<page>/<year>/" and "<page>/<year>/<month>/"
+    archive_urls = True
+
+    # keyset (cursor) pagination: pages are selected by "after" or "before"
+    # cursors built from items ordering values instead of page number
+    keyset_pagination = False
+    keyset_paginator = KeysetPaginator
+    keyset_pagination_class = KeysetPagination
+
+    def get_item_filter(self, page, slug):
+        """
+        Get filter of item by its slug: indexed lookup by stored url_path,
+        items with not filled url_path (e.g. created before url_path field
+        was added, see FillItemsUrlPaths operation) are found by slug.
+        """
+        return (Q(url_path='%s/%s' % (page.url_path, slug,)) |
+                Q(url_path__isnull=True, slug=slug))
 
     def consume_url_segments(self, page, segments):
-        if not len(segments) == 1:
+        # single indexed lookup by stored item url_path
+        if len(segments) == 1:
+            if page.items.filter(
+                    self.get_item_filter(page, segments[0])).exists():
+                self.kwargs['item'] = segments[0]
+                return True
+        return self.archive_urls and self.consume_archive_segments(
+            page, segments)
+
+    def consume_archive_segments(self, page, segments):
+        """Consume "year/" and "year/month/" segments of existing archive."""
+        if not (len(segments) in (1, 2,) and len(segments[0]) == 4 and
+                all(i.isdigit() and len(i) <= 4 for i in segments)):
             return False
-        if page.items.filter(slug=segments[0]).exists():
-            self.kwargs['item'] = segments[0]
+        year, month = int(segments[0]), None
+        if len(segments) == 2:
+            month = int(segments[1])
+            if not 1 <= month <= 12:
+                return False
+        if page.archive_exists(year, month):
+            self.kwargs['archive'] = (year, month,)
             return True
         return False
 
@@ -36,8 +87,13 @@ class ItemPageView(PageView):
         item = self.kwargs.get('item', None)
 
         self.queryset_list = node.get_item_queryset().visible()
+        archive = self.kwargs.get('archive', None)
+        if archive:
+            self.queryset_list = self.queryset_list.filter(
+                node.get_archive_filter(*archive))
         self.queryset_item = (
-            node.get_item_queryset().filter(slug=item) if item else None)
+            node.get_item_queryset().filter(
+                self.get_item_filter(node, item)) if item else None)
 
     def behaviour(self):
         node = self.node
@@ -58,6 +114,8 @@ class ItemPageView(PageView):
         # main item behaviour
         if node.behaviour == 'node':
             return self.view_node()
+        elif 'archive' in self.kwargs:
+            return self.view_list()
         elif node.behaviour == 'item' or 'item' in self.kwargs:
             return self.view_item()
         else:
@@ -66,32 +124,103 @@ class ItemPageView(PageView):
     def view_list(self):
         """node list of items view"""
         node = self.node
-        onpage = node.onpage if 0 < node.onpage < 1000 else 10
-
-        # paginator and page
-        paginator = Paginator(self.queryset_list, onpage)
-        page = self.request.GET.get('page', '1')
-        page = int(page) if page.isdigit() else 1
-        try:
-            page_item = paginator.page(page)
-        except (EmptyPage, InvalidPage):
-            page = paginator.num_pages
-            page_item = paginator.page(page)
-        page_item.pagination = self.pagination(page_item)
-        # end paginator
+        models = [type(node), node.get_base_model(),]
 
         self.set_template_name_variants(
-            'list', node.alt_template, [type(node), node.get_base_model(),])
+            self.list_template_type, node.alt_template, models)
 
+        archive = self.kwargs.get('archive', None)
         context = {
             'node': node,
-            'page_item': page_item,
-            'url_no_page': node.get_absolute_url(),
+            'page_item': None,
+            'list_fragment': None,
+            'archive_period': archive,
+            'url_no_page': (node.get_archive_url(*archive) if archive else
+                            node.get_absolute_url()),
             'querystring': QueryString(self.request),
         }
 
+        if not self.list_cache:
+            context['page_item'] = self.get_page_item()
+            return context
+
+        # rendered list fragment (items with pagination), if it is cached,
+        # items are neither queried nor rendered
+        cache, key = get_cache(), self.get_list_cache_key()
+        fragment = cache.get(key)
+        if fragment is None:
+            context['page_item'] = self.get_page_item()
+            fragment = render_to_string(self.get_template_name_variants(
+                self.list_fragment_template_type, node.alt_template, models,
+            ), self.get_context_data(**context), request=self.request)
+            cache.set(key, fragment, self.list_cache_timeout)
+        context['list_fragment'] = mark_safe(fragment)
+
         return context
 
+    def get_page_item(self):
+        onpage = self.get_onpage()
+
+        # paginator and page
+        if self.keyset_pagination:
+            page_item = self.get_keyset_page(onpage)
+        else:
+            paginator = Paginator(self.queryset_list, onpage,
+                                  count=self.get_list_count())
+            page = self.request.GET.get('page', '1')
+            page = int(page) if page.isdigit() else 1
+            try:
+                page_item = paginator.page(page)
+            except (EmptyPage, InvalidPage):
+                page = paginator.num_pages
+                page_item = paginator.page(page)
+            page_item.pagination = self.pagination(page_item)
+        # end paginator
+
+        return page_item
+
+    def get_list_cache_key(self):
+        """
+        Get list fragment cache key: node items version, language, ordering,
+        filters, archive period and query string (page number or cursor,
+        links parameters).
+        """
+        node = self.node
+        state = '|'.join([
+            ' '.join(node.get_order_by()),
+            ' '.join(str(getattr(node, i)) for i in node.FILTER_FIELDS),
+            '%s-%s' % self.kwargs.get('archive', (None, None,)),
+            urlencode(sorted(self.request.GET.lists()), doseq=True),
+        ])
+        return make_key(
+            'items', 'list', node._meta.label_lower, node.pk,
+            node.get_items_version(), get_language(),
+            hashlib.md5(state.encode('utf-8')).hexdigest())
+
+    def get_onpage(self):
+        onpage = getattr(self.node, 'onpage', 0)
+        return onpage if 0 < onpage < 1000 else 10
+
+    def get_list_count(self):
+        """
+        Get count of list items if it is known (stored and exact), stored
+        count is page-wide, so it is not used for archive period lists,
+        zero value is not trusted (it is default value of not counted page)
+        and is checked by paginator.
+        """
+        node = self.node
+        if 'archive' in self.kwargs or not node.items_count:
+            return None
+        return node.items_count if node.items_count_is_exact() else None
+
+    def get_keyset_page(self, onpage):
+        paginator = self.keyset_paginator(
+            self.queryset_list, onpage, self.node.get_order_by())
+        page_item = paginator.page(after=self.request.GET.get('after'),
+                                   before=self.request.GET.get('before'))
+        page_item.pagination = self.keyset_pagination_class(page_item)
+        return page_item
+
     def view_item(self):
         """node item's detail view"""
         queryset = (self.queryset_list if self.queryset_item is None else
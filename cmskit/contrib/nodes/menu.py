@@ -1,14 +1,87 @@
+from collections import namedtuple
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.shortcuts import get_current_site
+from django.db.models import Q
 from nodes.base import Menu, registry
+from cmskit import conf
+from cmskit.utils.cache import get_cache, make_key
+from cmskit.utils.urls import page_url_builder
+
+
+class PageRecordMixin:
+    """
+    Page-like behaviour of lightweight tuple based page records,
+    loaded by PageMenu instead of model instances.
+    """
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def specific_class(self):
+        return ContentType.objects.get_for_id(
+            self.content_type_id).model_class()
+
+    def get_menu_title(self):
+        return self.menu_title or self.title
+
+
+_record_classes = {}
+
+
+def get_page_record_class(fields):
+    """Get (create once) page record class for fields tuple."""
+    record_class = _record_classes.get(fields, None)
+    if record_class is None:
+        record_class = type('PageRecord', (
+            PageRecordMixin, namedtuple('PageRecordBase', fields),
+        ), {'__slots__': ()})
+        _record_classes[fields] = record_class
+    return record_class
 
 
 class PageMenu(Menu):
     model_class = None
     navigation_node_class = registry.navigation_node
 
+    # built nodes are cached until any page in tree is saved, moved or deleted,
+    # cache is shared by all requests of the same site and variant, so menus
+    # with request dependent get_queryset should extend get_cache_variant
+    cache_enabled = False
+    cache_timeout = conf.CACHE_TIMEOUT
+    # remove pages with menu_login_required (and its branches) from nodes
+    # for anonymous users, nodes are cached separately for anonymous and
+    # authenticated users only if tree contains such pages
+    hide_login_required = False
+
+    # load only the branch of current page: top levels up to partial_depth,
+    # ancestors of current page with their siblings and its children
+    partial = False
+    partial_depth = 1
+
+    # exclude pruned branches (see get_prune_q) with additional query
+    # instead of fetching and skipping them one by one
+    prune_in_sql = False
+
+    # load pages as lightweight records with only required fields instead
+    # of specific model instances (note: get_metatags is not available),
+    # additional fields can be declared in record_extra_fields
+    use_records = False
+    record_fields = (
+        'id', 'parent_id', 'content_type_id', 'path', 'depth', 'active',
+        'title', 'menu_title', 'menu_in', 'menu_in_chain', 'menu_jump',
+        'menu_extender', 'menu_login_required', 'menu_show_current',
+        'url_name', 'url_path', 'url_text',
+    )
+    record_extra_fields = ()
+
     def get_data(self, page):
         attr = {
-            'reverse_id': '%s_%s' % (page.__class__.__name__.lower(), page.pk),
+            'reverse_id': '%s_%s' % (
+                (page.specific_class or self.model_class).__name__.lower(),
+                page.pk),
             'auth_required': page.menu_login_required,
             'show_meta_selected': page.menu_show_current,
             'jump': page.menu_jump,
@@ -19,27 +92,153 @@ class PageMenu(Menu):
             attr['navigation_extenders'] = [
                 i.strip() for i in page.menu_extender.split(',') if i.strip()
             ]
+        # items count badge (see contrib.items app), items count changes do
+        # not change tree version, so cached value may be outdated
+        if hasattr(page, 'items_count'):
+            attr['items_count'] = page.items_count
         # builtin metatags support (see contrib.metatags app)
         if hasattr(page, 'get_metatags'):
             attr['metatags'] = page.get_metatags()
         return attr
 
     def get_queryset(self, request):
-        return self.model_class.objects.active().specific()
+        queryset = self.model_class.objects.active()
+        if self.partial:
+            queryset = queryset.filter(
+                self.get_partial_q(self.get_current_page(request)))
+        return queryset
+
+    def get_pages(self, request):
+        queryset = self.get_queryset(request).order_by('path')
+        if self.prune_in_sql:
+            queryset = self.exclude_pruned_branches(request, queryset)
+        if not self.use_records:
+            return queryset.specific()
+
+        fields = tuple(self.record_fields) + tuple(self.record_extra_fields)
+        record_class = get_page_record_class(fields)
+        return (record_class._make(i) for i in queryset.values_list(*fields))
+
+    # pruning section
+    def get_prune_q(self, request):
+        """
+        Return Q object, matching pages, which should be removed from menu
+        with whole branches (also see page_is_active method).
+        """
+        q = Q(active=False)
+        if self.hide_login_required and not request.user.is_authenticated:
+            q |= Q(menu_login_required=True)
+        return q
+
+    def exclude_pruned_branches(self, request, queryset):
+        """
+        Exclude branches of pruned pages in SQL, so they are never fetched.
+        Only topmost pruned pages are used, nested ones are skipped.
+        """
+        paths, q = [], Q()
+        for path in (queryset.filter(self.get_prune_q(request))
+                             .order_by('path').values_list('path', flat=True)):
+            if paths and path.startswith(paths[-1]):
+                continue
+            paths.append(path)
+            q |= Q(path__startswith=path)
+        return queryset.exclude(q) if paths else queryset
+
+    # partial loading section
+    def get_current_page(self, request):
+        """
+        Get current page, set by PageView as request.current_page,
+        or find it by request path and url_path value otherwise.
+        """
+        if hasattr(request, 'current_page'):
+            return request.current_page
+
+        page, pattern = None, page_url_builder.get_pattern(
+            page_url_builder.get_view_name(self.model_class))
+        if pattern and request.path.startswith(pattern[0]):
+            link = request.path[len(pattern[0]):].strip('/')
+            path = link.split('/')
+            paths = ['/'.join(path[:i]) for i in range(len(path), 0, -1)]
+            page = (self.model_class.objects.active()
+                        .filter(url_path__in=paths).order_by('-url_path')
+                        .only('path', 'depth', 'url_path').first())
+        request.current_page = page
+        return page
+
+    def get_partial_q(self, page):
+        q = Q(depth__lte=self.partial_depth)
+        if page is None:
+            return q
+
+        # each page in chain from root to current with its siblings
+        steplen = page.steplen
+        for depth in range(1, page.depth + 1):
+            path = page.path[:(depth - 1) * steplen]
+            q |= Q(path__startswith=path, depth=depth)
+
+        # children of current page
+        return q | self.model_class.objects.child_of_q(page)
+
+    def get_partial_key(self, request):
+        page = self.get_current_page(request) if self.partial else None
+        return page.path if page else ''
+
+    # cache section
+    def get_cache_key(self, request, *parts):
+        return make_key(
+            'menu', type(self).__module__, type(self).__name__,
+            self.model_class._meta.label_lower,
+            self.model_class.get_tree_version(), *parts)
+
+    def get_cache_variant(self, request):
+        """
+        Return the name of nodes variant, cached for current request.
+        Nodes depend on user only if hide_login_required is set and any page
+        in tree requires login, otherwise one variant is shared by everyone.
+        Extend it, if nodes depend on other request values.
+        """
+        if not self.hide_login_required:
+            return ''
+        cache, key = get_cache(), self.get_cache_key(request, 'login')
+        login_required = cache.get(key)
+        if login_required is None:
+            login_required = self.model_class.objects.active().filter(
+                menu_login_required=True).exists()
+            cache.set(key, login_required, self.cache_timeout)
+        if not login_required:
+            return ''
+        return 'auth' if request.user.is_authenticated else 'anon'
 
     def get_nodes(self, request):
         if not self.model_class:
             raise ValueError('model_class variable is not defined in PageMenu')
-        pages = self.get_queryset(request)
-        nodes, home, cut_branch, cut_level = [], None, False, None
+        if not self.cache_enabled:
+            return self.build_nodes(request)
+
+        cache = get_cache()
+        key = self.get_cache_key(request, 'nodes',
+                                 get_current_site(request).domain,
+                                 self.get_cache_variant(request),
+                                 self.get_partial_key(request))
+        nodes = cache.get(key)
+        if nodes is None:
+            nodes = self.build_nodes(request)
+            cache.set(key, nodes, self.cache_timeout)
+        return nodes
+
+    def build_nodes(self, request):
+        hide_login_required = (self.hide_login_required and
+                               not request.user.is_authenticated)
+        pages = self.get_pages(request)
+        nodes, cut_path = [], None
         for page in pages:
-            # remove inactive nodes
-            if cut_branch:
-                if cut_level < page.level: continue
-                cut_branch = False
-            if not self.page_is_active(page):
-                cut_branch = True
-                cut_level = page.level
+            # remove inactive nodes with whole branches, pages are ordered
+            # by path, so branch is a sequence of pages with the same prefix
+            if cut_path is not None and page.path.startswith(cut_path):
+                continue
+            if not self.page_is_active(page) or (
+                    hide_login_required and page.menu_login_required):
+                cut_path = page.path
                 continue
             nodes.append(self.page_to_navigation_node(page))
         return nodes
@@ -47,10 +246,15 @@ class PageMenu(Menu):
     def page_is_active(self, page):
         return page.active
 
+    def get_page_url(self, page):
+        # reverse-free url, built from stored url_path value
+        return page_url_builder.get_url(
+            page, page.specific_class or self.model_class)
+
     def page_to_navigation_node(self, page):
         n = self.get_navigation_node_class()(
             page.get_menu_title(),
-            page.get_absolute_url(),
+            self.get_page_url(page),
             page.pk,
             page.parent_id,
             visible=page.menu_in,
@@ -0,0 +1 @@
+default_app_config = 'cmskit.contrib.search.apps.SearchConfig'
@@ -0,0 +1,27 @@
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_save, post_delete
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchConfig(AppConfig):
+    name = 'cmskit.contrib.search'
+    label = 'cmskit_search'
+    verbose_name = _('Search index')
+
+    def ready(self):
+        from cmskit.signals import pages_published_changed
+        from . import handlers, index
+        # handlers are connected to indexable models only, so fast delete
+        # of other models is not disabled by post_delete receivers
+        for model in apps.get_models():
+            if not index.is_indexable(model):
+                continue
+            uid = model._meta.label_lower
+            post_save.connect(handlers.post_save_handler, sender=model,
+                              dispatch_uid='cmskit_search_post_save_%s' % uid)
+            post_delete.connect(
+                handlers.post_delete_handler, sender=model,
+                dispatch_uid='cmskit_search_post_delete_%s' % uid)
+        pages_published_changed.connect(
+            handlers.pages_published_changed_handler,
+            dispatch_uid='cmskit_search_pages_published_changed')
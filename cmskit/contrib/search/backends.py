@@ -0,0 +1,220 @@
+from django.db import connections
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from cmskit import conf
+
+
+class BaseSearchBackend(object):
+    """
+    Search backend, which installs vendor specific full text index for
+    SearchEntry table (in migrations) and filters entries by query.
+    """
+
+    def __init__(self, using):
+        self.using = using
+
+    @property
+    def table(self):
+        from .models import SearchEntry
+        return SearchEntry._meta.db_table
+
+    @classmethod
+    def is_supported(cls, connection):
+        return True
+
+    def is_installed(self):
+        return True
+
+    def install(self, schema_editor):
+        pass
+
+    def uninstall(self, schema_editor):
+        pass
+
+    def get_words(self, query):
+        return [i for i in query.split() if i]
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Fallback backend for databases without full text index support,
+    scans only the compact entries table with icontains conditions.
+    """
+
+    def search(self, queryset, query):
+        words = self.get_words(query)
+        if not words:
+            return queryset.none()
+        filter = Q()
+        for word in words:
+            filter &= Q(title__icontains=word) | Q(body__icontains=word)
+        # there is no rank, so the latest entries are the first
+        return queryset.filter(filter).order_by('-date_update', '-id')
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 backend: external content virtual table, synchronized
+    with entries table by triggers, results are ordered by bm25 rank.
+    """
+
+    weights = (10.0, 1.0,)  # title and body bm25 weights
+
+    @property
+    def fts_table(self):
+        return '%s_fts' % self.table
+
+    @classmethod
+    def is_supported(cls, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            return 'ENABLE_FTS5' in [row[0] for row in cursor.fetchall()]
+
+    def is_installed(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [self.fts_table])
+            return cursor.fetchone() is not None
+
+    def install(self, schema_editor):
+        sql = {'table': self.table, 'fts': self.fts_table}
+        for statement in (
+            "CREATE VIRTUAL TABLE {fts} USING fts5("
+            "title, body, content='{table}', content_rowid='id')",
+            "CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN"
+            " INSERT INTO {fts}(rowid, title, body)"
+            " VALUES (new.id, new.title, new.body); END",
+            "CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN"
+            " INSERT INTO {fts}({fts}, rowid, title, body)"
+            " VALUES ('delete', old.id, old.title, old.body); END",
+            "CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN"
+            " INSERT INTO {fts}({fts}, rowid, title, body)"
+            " VALUES ('delete', old.id, old.title, old.body);"
+            " INSERT INTO {fts}(rowid, title, body)"
+            " VALUES (new.id, new.title, new.body); END",
+            "INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ):
+            schema_editor.execute(statement.format(**sql))
+
+    def uninstall(self, schema_editor):
+        for suffix in ('ai', 'ad', 'au',):
+            schema_editor.execute('DROP TRIGGER IF EXISTS %s_%s' % (
+                self.fts_table, suffix,))
+        schema_editor.execute('DROP TABLE IF EXISTS %s' % self.fts_table)
+
+    def get_match(self, words):
+        # each word is a quoted string (no fts syntax), last one is prefix
+        words = ['"%s"' % i.replace('"', '""') for i in words]
+        words[-1] = '%s*' % words[-1]
+        return ' '.join(words)
+
+    def search(self, queryset, query):
+        words = self.get_words(query)
+        if not words:
+            return queryset.none()
+        fts = self.fts_table
+        return queryset.extra(
+            tables=[fts],
+            where=['%s.rowid = %s.id' % (fts, self.table),
+                   '%s MATCH %%s' % fts],
+            params=[self.get_match(words)],
+            select={'rank': 'bm25(%s, %s)' % (
+                fts, ', '.join(map(str, self.weights)))},
+            order_by=['rank'])
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL backend: weighted generated tsvector column with GIN index,
+    results are ordered by ts_rank (requires PostgreSQL 12+), text search
+    configuration is defined by CMSKIT_SEARCH_CONFIG setting.
+    """
+
+    column = 'search_vector'
+
+    @property
+    def config(self):
+        return conf.SEARCH_CONFIG
+
+    @classmethod
+    def is_supported(cls, connection):
+        # generated stored columns are available since PostgreSQL 12
+        return connection.pg_version >= 120000
+
+    def is_installed(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                'SELECT 1 FROM information_schema.columns'
+                ' WHERE table_name = %s AND column_name = %s',
+                [self.table, self.column])
+            return cursor.fetchone() is not None
+
+    def install(self, schema_editor):
+        config = schema_editor.quote_value(self.config)
+        schema_editor.execute(
+            'ALTER TABLE {table} ADD COLUMN {column} tsvector'
+            ' GENERATED ALWAYS AS ('
+            "setweight(to_tsvector({config}::regconfig,"
+            " coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector({config}::regconfig,"
+            " coalesce(body, '')), 'B')) STORED".format(
+                table=self.table, column=self.column, config=config))
+        schema_editor.execute(
+            'CREATE INDEX {table}_{column}_gin ON {table}'
+            ' USING GIN ({column})'.format(table=self.table,
+                                            column=self.column))
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute('DROP INDEX IF EXISTS %s_%s_gin' % (
+            self.table, self.column,))
+        schema_editor.execute('ALTER TABLE %s DROP COLUMN IF EXISTS %s' % (
+            self.table, self.column,))
+
+    def search(self, queryset, query):
+        if not self.get_words(query):
+            return queryset.none()
+        column = '%s.%s' % (self.table, self.column)
+        tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+        return queryset.extra(
+            where=['%s @@ %s' % (column, tsquery)],
+            params=[self.config, query],
+            select={'rank': 'ts_rank(%s, %s)' % (column, tsquery)},
+            select_params=[self.config, query],
+            order_by=['-rank'])
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backends = {}
+
+
+def get_search_backend_class(connection):
+    """Get backend class for connection (CMSKIT_SEARCH_BACKEND or vendor)."""
+    if conf.SEARCH_BACKEND:
+        return import_string(conf.SEARCH_BACKEND)
+    backend_class = VENDOR_BACKENDS.get(connection.vendor, None)
+    if backend_class is None or not backend_class.is_supported(connection):
+        return DatabaseSearchBackend
+    return backend_class
+
+
+def get_search_backend(using='default'):
+    """
+    Get (create once) search backend for database alias, fallback backend
+    is used if full text index is not installed (migrations are not run
+    or database did not support it while migrating).
+    """
+    backend = _backends.get(using, None)
+    if backend is None:
+        backend = get_search_backend_class(connections[using])(using)
+        if not backend.is_installed():
+            backend = DatabaseSearchBackend(using)
+        _backends[using] = backend
+    return backend
@@ -0,0 +1,38 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from cmskit.models import BasePage
+from cmskit.models.query import subtrees_q
+from cmskit.contrib.items.models import BaseItemPage
+from . import index
+from .models import SearchEntry
+
+
+def post_save_handler(sender, instance, raw=False, **kwargs):
+    if raw or not index.is_indexable(sender):
+        return
+    # non specific page save is followed by specific one (see BasePage.save)
+    if (isinstance(instance, BasePage) and
+            type(instance) is not instance.specific_class):
+        return
+    index.update_entry(instance)
+    if isinstance(instance, BaseItemPage):
+        index.update_page_items_entries(instance)
+
+
+def post_delete_handler(sender, instance, **kwargs):
+    if index.is_indexable(sender):
+        index.delete_entry(instance)
+
+
+def pages_published_changed_handler(sender, paths, **kwargs):
+    """Update active state of entries in bulk (un)published subtrees."""
+    entries = SearchEntry.objects.filter(subtrees_q(paths))
+    for content_type_id in set(entries.values_list('content_type',
+                                                   flat=True)):
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        active = model._base_manager.filter(
+            pk=models.OuterRef('object_id')).values('active')[:1]
+        entries.filter(content_type_id=content_type_id).update(
+            active=models.Subquery(active))
@@ -0,0 +1,136 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.utils.html import strip_tags
+from cmskit.models import BasePage
+from cmskit.contrib.items.models import BaseItem
+from .models import SearchEntry
+
+
+def is_indexable(model):
+    """
+    Pages and items models are indexed, excluding instances of models
+    with search_indexable attribute set to False.
+    """
+    return (issubclass(model, (BasePage, BaseItem,)) and
+            not model._meta.abstract)
+
+
+def get_document(instance):
+    """
+    Get indexed text of instance as dict with title and body values or
+    None, if instance should not be indexed. Models may define their own
+    get_search_document method or list of body fields as search_fields.
+    """
+    if not getattr(instance, 'search_indexable', True):
+        return None
+    if hasattr(instance, 'get_search_document'):
+        return instance.get_search_document()
+    body = [getattr(instance, i, None)
+            for i in getattr(instance, 'search_fields', ())]
+    return {
+        'title': instance.title,
+        'body': '\n'.join(strip_tags(str(i)) for i in body if i),
+    }
+
+
+def get_entry_values(instance):
+    """Get SearchEntry fields values of page or item instance."""
+    document = get_document(instance)
+    if document is None:
+        return None
+    if isinstance(instance, BasePage):
+        page_id, path = instance.pk, instance.path
+    else:
+        page_id, path = instance.page_id, instance.page.path
+    return dict(document, page_id=page_id, path=path, active=instance.active)
+
+
+def get_content_type(instance):
+    # pages are indexed with their own (specific) content type
+    if isinstance(instance, BasePage):
+        return ContentType.objects.get_for_id(instance.content_type_id)
+    return ContentType.objects.get_for_model(instance)
+
+
+def get_content_types(model):
+    """Get content types of entries, created for instances of model."""
+    if not issubclass(model, BasePage):
+        return [ContentType.objects.get_for_model(model)]
+    models = model.get_page_models()
+    return set(
+        list(ContentType.objects.get_for_models(*models).values()) +
+        list(ContentType.objects.get_for_models(
+            *models, for_concrete_models=False).values()))
+
+
+def update_entry(instance):
+    content_type = get_content_type(instance)
+    values = get_entry_values(instance)
+    if values is None:
+        return delete_entry(instance)
+    SearchEntry.objects.update_or_create(
+        content_type=content_type, object_id=instance.pk, defaults=values)
+
+
+def delete_entry(instance):
+    SearchEntry.objects.filter(content_type=get_content_type(instance),
+                               object_id=instance.pk).delete()
+
+
+def update_page_items_entries(page):
+    """
+    Update tree data of page items entries with one query, items may be
+    updated without save (see BaseItemPage.page_is_moved_handler).
+    """
+    item_model = page.get_item_model()
+    if not is_indexable(item_model):
+        return
+    # active state is the same as BaseItem.get_active returns
+    published = item_model._base_manager.filter(
+        pk=models.OuterRef('object_id')).values('published')[:1]
+    (SearchEntry.objects
+         .filter(content_type=ContentType.objects.get_for_model(item_model),
+                 page_id=page.pk)
+         .update(path=page.path, active=(
+             models.Subquery(published) if page.active else False)))
+
+
+def rebuild(model, batch_size=500):
+    """
+    Rebuild entries of model instances (of all pages types for base pages
+    model) in batches, return count of indexed instances, stale entries
+    of deleted instances are also removed.
+    """
+    content_types = get_content_types(model)
+    entries = SearchEntry.objects.filter(content_type__in=content_types)
+    if issubclass(model, BasePage):
+        queryset = model.objects.order_by('pk')
+    else:
+        queryset = model._base_manager.select_related('page').order_by('pk')
+
+    count, last_pk = 0, 0
+    while True:
+        instances = queryset.filter(pk__gt=last_pk)[:batch_size]
+        if issubclass(model, BasePage):
+            instances = instances.specific()
+        instances = list(instances)
+        if not instances:
+            break
+        previous_pk, last_pk = last_pk, instances[-1].pk
+
+        created = []
+        for instance in instances:
+            values = get_entry_values(instance)
+            if values is not None:
+                created.append(SearchEntry(
+                    content_type=get_content_type(instance),
+                    object_id=instance.pk, **values))
+
+        with transaction.atomic():
+            entries.filter(object_id__gt=previous_pk,
+                           object_id__lte=last_pk).delete()
+            SearchEntry.objects.bulk_create(created)
+        count += len(created)
+
+    entries.filter(object_id__gt=last_pk).delete()
+    return count
@@ -0,0 +1,37 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from cmskit.models import BasePage
+from cmskit.contrib.search import index
+
+
+class Command(BaseCommand):
+    help = ('Rebuild search index entries of pages and items in batches'
+            ' (all indexed models or only specified ones).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help='Models to reindex (base pages model reindexes all pages).')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Count of instances loaded from database at once.')
+
+    def get_models(self, labels):
+        if labels:
+            try:
+                models = [apps.get_model(i) for i in labels]
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+        else:
+            models = apps.get_models()
+        models = [i for i in models if index.is_indexable(i)]
+        # pages are reindexed by base model, it iterates over all page types
+        return list(dict.fromkeys(
+            i.get_base_model() if issubclass(i, BasePage) else i
+            for i in models))
+
+    def handle(self, *args, **options):
+        for model in self.get_models(options['models']):
+            count = index.rebuild(model, batch_size=options['batch_size'])
+            self.stdout.write('%s: %d entries indexed.' % (
+                model._meta.label, count,))
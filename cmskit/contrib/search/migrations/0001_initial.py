@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def install_search_index(apps, schema_editor):
+    from cmskit.contrib.search.backends import get_search_backend_class
+    connection = schema_editor.connection
+    get_search_backend_class(connection)(connection.alias).install(
+        schema_editor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from cmskit.contrib.search.backends import get_search_backend_class
+    connection = schema_editor.connection
+    get_search_backend_class(connection)(connection.alias).uninstall(
+        schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='object id')),
+                ('page_id', models.PositiveIntegerField(db_index=True, verbose_name='page id')),
+                ('path', models.CharField(db_index=True, max_length=255, verbose_name='path')),
+                ('active', models.BooleanField(default=False, verbose_name='is active')),
+                ('title', models.CharField(max_length=2048, verbose_name='title')),
+                ('body', models.TextField(blank=True, verbose_name='body')),
+                ('date_update', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype', verbose_name='content type')),
+            ],
+            options={
+                'verbose_name': 'search entry',
+                'verbose_name_plural': 'search entries',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        # vendor specific full text index (see backends)
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
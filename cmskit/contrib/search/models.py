@@ -0,0 +1,53 @@
+from django.db import models
+from django.contrib.contenttypes.models import ContentType
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchEntryQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(active=True)
+
+    def descendant_of(self, page, inclusive=True):
+        """
+        Entries of page subtree (treebeard path prefix), not inclusive
+        queryset excludes only entry of page itself, not of its items.
+        """
+        queryset = self.filter(path__startswith=page.path)
+        return queryset if inclusive else queryset.exclude(
+            content_type_id=page.content_type_id, object_id=page.pk)
+
+    def search(self, query):
+        """Filter entries by full text query, ordered by relevance."""
+        from .backends import get_search_backend
+        return get_search_backend(self.db).search(self, query)
+
+
+class SearchEntry(models.Model):
+    """
+    Search index entry of page or item, contains indexed text and
+    tree data (page id and path), so results can be limited by subtree.
+    """
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name='+',
+        verbose_name=_('content type'))
+    object_id = models.PositiveIntegerField(_('object id'))
+
+    page_id = models.PositiveIntegerField(_('page id'), db_index=True)
+    path = models.CharField(_('path'), max_length=255, db_index=True)
+    active = models.BooleanField(_('is active'), default=False)
+
+    title = models.CharField(_('title'), max_length=2048)
+    body = models.TextField(_('body'), blank=True)
+
+    date_update = models.DateTimeField(editable=False, auto_now=True)
+
+    objects = SearchEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('search entry')
+        verbose_name_plural = _('search entries')
+        unique_together = (('content_type', 'object_id',),)
+
+    def __str__(self):
+        return self.title
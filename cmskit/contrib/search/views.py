@@ -0,0 +1,89 @@
+from collections import defaultdict
+from django.http import HttpResponseRedirect
+from django.contrib.contenttypes.models import ContentType
+from cmskit.utils import jump_node_by_node
+from cmskit.contrib.items.views import ItemPageView
+from .models import SearchEntry
+
+
+class SearchPageView(ItemPageView):
+    """
+    Search results view for any page, finds active pages and items in
+    the subtree of current page, results are paginated as items list.
+    Each entry in page_item.object_list has found instance as "object".
+    """
+
+    query_param = 'q'
+    query_max_length = 256
+    list_template_type = 'search'
+    keyset_pagination = False  # results are ordered by rank
+    list_cache = False
+
+    def consume_url_segments(self, page, segments):
+        return False
+
+    def get_query(self):
+        query = self.request.GET.get(self.query_param, '')
+        return query.strip()[:self.query_max_length]
+
+    def get_search_queryset(self, query):
+        return (SearchEntry.objects.using(self.node._state.db).active()
+                           .descendant_of(self.node, inclusive=False)
+                           .search(query))
+
+    def prepare_querysets(self):
+        self.query = self.get_query()
+        self.queryset_list = self.get_search_queryset(self.query)
+        self.queryset_item = None
+
+    def behaviour(self):
+        node = self.node
+
+        self.prepare_querysets()
+
+        # extra view
+        if node.alt_view:
+            response = self.get_alt_view_by_name(node.alt_view, 'node')
+            if response:
+                return response
+
+        # menu jump
+        node_to = node.menu_jump and jump_node_by_node(node)
+        if node_to:
+            return HttpResponseRedirect(node_to.get_absolute_url())
+
+        return self.view_list()
+
+    def get_list_count(self):
+        return None
+
+    def load_objects(self, entries):
+        """Load found instances with one query per content type."""
+        pks = defaultdict(list)
+        for entry in entries:
+            pks[entry.content_type_id].append(entry.object_id)
+
+        objects = {}
+        for content_type_id, ids in pks.items():
+            model = ContentType.objects.get_for_id(
+                content_type_id).model_class()
+            if model is None:
+                continue
+            for obj in model._default_manager.filter(pk__in=ids):
+                objects[(content_type_id, obj.pk)] = obj
+
+        result = []
+        for entry in entries:
+            entry.object = objects.get(
+                (entry.content_type_id, entry.object_id), None)
+            if entry.object is not None:
+                result.append(entry)
+        return result
+
+    def view_list(self):
+        context = super().view_list()
+        page_item = context['page_item']
+        page_item.object_list = self.load_objects(list(page_item.object_list))
+        context['query'] = self.query
+        context['query_param'] = self.query_param
+        return context
@@ -25,9 +25,13 @@ from django.utils.translation import gettext_lazy as _
 from treebeard.mp_tree import MP_Node
 from treebeard.exceptions import InvalidPosition
 
+from .constraints import (get_page_type_constraints,
+                          get_page_type_availability)
 from .query import PageManager
 from .ti import TIModelBase, TIBaseModel
 from ..utils import resolve_model_string
+from ..utils.cache import get_version, bump_version_on_commit
+from ..utils.urls import page_url_builder
 
 
 logger = logging.getLogger('cmskit.models')
@@ -222,9 +226,23 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
     def __str__(self):
         return self.title
 
-    def unpublish(self, set_expired=False, commit=True):
-        if self.live:
-            logger.info("Page unpublished: \"%s\" id=%d", self.title, self.id)
+    def publish(self, descendants=False):
+        return self.set_published(True, descendants=descendants)
+
+    def unpublish(self, descendants=False):
+        return self.set_published(False, descendants=descendants)
+
+    def set_published(self, published, descendants=False):
+        """
+        Publish or unpublish page (and its descendants if required) without
+        saving each page in subtree (see PageQuerySet.set_published).
+        """
+        count = type(self).objects.filter(pk=self.pk).set_published(
+            published, descendants=descendants)
+        self.published, self.active = (
+            type(self).objects.filter(pk=self.pk)
+                              .values_list('published', 'active').get())
+        return count
 
     def get_template(self, request, *args, **kwargs):
         if request.is_ajax():
@@ -281,16 +299,21 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
 
         return cls._clean_parent_page_models
 
+    @classmethod
+    def get_page_type_constraints(cls):
+        """
+        Returns precomputed page types constraints matrix of pages tree
+        (see cmskit.models.constraints).
+        """
+        return get_page_type_constraints(cls)
+
     @classmethod
     def allowed_parent_page_models(cls):
         """
         Returns the list of page types that this page type can be a subpage of,
         as a list of model classes
         """
-        return [
-            parent_model for parent_model in cls.clean_parent_page_models()
-            if cls in parent_model.clean_subpage_models()
-        ]
+        return list(cls.get_page_type_constraints().parents[cls])
 
     @classmethod
     def allowed_subpage_models(cls):
@@ -298,10 +321,7 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
         Returns the list of page types that this page type can have as subpages,
         as a list of model classes
         """
-        return [
-            subpage_model for subpage_model in cls.clean_subpage_models()
-            if cls in subpage_model.clean_parent_page_models()
-        ]
+        return list(cls.get_page_type_constraints().subpages[cls])
 
     @classmethod
     def creatable_subpage_models(cls):
@@ -309,10 +329,7 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
         Returns the list of page types that may be created under this page type,
         as a list of model classes
         """
-        return [
-            page_model for page_model in cls.allowed_subpage_models()
-            if page_model.is_creatable
-        ]
+        return list(cls.get_page_type_constraints().creatable_subpages[cls])
 
     @classmethod
     def can_exist_under(cls, parent):
@@ -322,7 +339,8 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
 
         See also: :func:`Page.can_create_at` and :func:`Page.can_move_to`
         """
-        return cls in parent.specific_class.allowed_subpage_models()
+        return cls.get_page_type_constraints().can_exist_under(
+            cls, parent.specific_class)
 
     @classmethod
     def can_create_at(cls, parent):
@@ -332,6 +350,38 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
         """
         return cls.is_creatable and cls.can_exist_under(parent)
 
+    @classmethod
+    def max_count_reached(cls):
+        """
+        Checks if the number of instances of this page type reached max_count,
+        only existence of max_count-th row is checked instead of full count.
+        """
+        if not cls.max_count:
+            return False
+        return cls.objects.order_by()[cls.max_count - 1:].exists()
+
+    @classmethod
+    def get_page_type_availability(cls, parent=None):
+        """
+        Returns page types availability object for parent page instance
+        (or for any place if parent is None) with available page types and
+        reasons of unavailability of others, cached per tree version
+        (see cmskit.models.constraints).
+        """
+        return get_page_type_availability(
+            cls, parent.specific_class if parent else None)
+
+    @classmethod
+    def page_type_availability(cls, parent=None):
+        """
+        Returns the dict of all page types of pages tree with boolean values,
+        which show whether page of that type can be created under parent page
+        instance (or anywhere if parent is None).
+        """
+        availability = cls.get_page_type_availability(parent)
+        return {model: model not in availability.reasons
+                for model in availability.constraints.models}
+
     def can_move_to(self, parent):
         """
         Checks if this page instance can be moved to be a subpage of a parent
@@ -458,11 +508,9 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
                                    if self.get_parent() else True)
 
     def get_absolute_url(self):
-        meta = self.get_base_model()._meta
         path, url = self.get_path_or_url()
-        view_name = self.view_name.format(app_label=meta.app_label,
-                                          model_name=meta.model_name)
-        return reverse(view_name, kwargs={'path': path,}) if path else url
+        return (page_url_builder.get_url_for_path(type(self), path)
+                if path else url)
 
     # ensure that changes are only committed when we have updated all descendant URL paths, to preserve consistency
     @transaction.atomic
@@ -505,6 +553,8 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
             for item in self.get_children():
                 item.save(is_moved=True)
 
+        self.invalidate_tree()
+
         # Log
         if is_new:
             logger.info(
@@ -512,6 +562,22 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
                 self.title, self.id, type(self)._meta.app_label,
                 type(self).__name__, self.url_path)
 
+    @classmethod
+    def get_tree_version_name(cls):
+        return 'tree:%s' % cls.get_base_model()._meta.label_lower
+
+    @classmethod
+    def get_tree_version(cls):
+        """
+        Return version of the whole pages tree, it changes on any page
+        save, move or delete and may be used as a part of cache keys.
+        """
+        return get_version(cls.get_tree_version_name())
+
+    @classmethod
+    def invalidate_tree(cls):
+        bump_version_on_commit(cls.get_tree_version_name())
+
     def page_is_moved_handler(self):
         # Extend this method if some actions required after Page is moved.
         pass
@@ -553,6 +619,7 @@ class BasePage(TIBaseModel, MP_Node, metaclass=PageBase):
         BasePage = self.get_base_model()
         if type(self) is BasePage:
             # this is a Page instance, so carry on as we were
+            self.invalidate_tree()
             return super().delete(*args, **kwargs)
         else:
             # retrieve an actual Page instance and delete that instead of self
@@ -0,0 +1,152 @@
+from collections import namedtuple
+from types import MappingProxyType
+from django.apps import apps
+from cmskit import conf
+from cmskit.utils.cache import get_cache, make_key
+from .ti import TI_MODEL_CLASSES
+
+
+PageTypeInfo = namedtuple('PageTypeInfo', ('is_creatable', 'max_count',))
+
+# reasons of page type unavailability
+NOT_CREATABLE = 'not_creatable'
+PARENT_NOT_ALLOWED = 'parent_not_allowed'
+MAX_COUNT_REACHED = 'max_count_reached'
+
+
+class PageTypeConstraints(object):
+    """
+    Immutable matrix of allowed parent/child page types of one pages tree
+    (base model) with page types metadata, built once from TI_MODEL_CLASSES
+    registry, so page type checks are dict and set lookups.
+    """
+
+    def __init__(self, base_model):
+        models = tuple(base_model.get_page_models())
+
+        subpages, parents = {}, {}
+        for model in models:
+            subpages[model] = tuple(
+                i for i in model.clean_subpage_models()
+                if model in i.clean_parent_page_models())
+            parents[model] = tuple(
+                i for i in model.clean_parent_page_models()
+                if model in i.clean_subpage_models())
+
+        self.base_model = base_model
+        self.models = models
+        self.info = MappingProxyType({
+            model: PageTypeInfo(model.is_creatable, model.max_count)
+            for model in models
+        })
+        self.subpages = MappingProxyType(subpages)
+        self.parents = MappingProxyType(parents)
+        self.creatable_subpages = MappingProxyType({
+            model: tuple(i for i in value if i.is_creatable)
+            for model, value in subpages.items()
+        })
+        self.subpage_sets = MappingProxyType({
+            model: frozenset(value) for model, value in subpages.items()
+        })
+        self.labels = MappingProxyType({
+            model._meta.label_lower: model for model in models
+        })
+
+    def can_exist_under(self, model, parent_model):
+        return model in self.subpage_sets.get(parent_model, ())
+
+    def get_unavailability_reasons(self, parent_model=None):
+        """
+        Get reasons, why page types can not be created under parent page
+        type (or anywhere if parent_model is None) as {model: reason} dict,
+        max_count is checked only for otherwise available page types.
+        """
+        reasons = {}
+        for model in self.models:
+            info = self.info[model]
+            if not info.is_creatable:
+                reasons[model] = NOT_CREATABLE
+            elif (parent_model is not None and
+                    not self.can_exist_under(model, parent_model)):
+                reasons[model] = PARENT_NOT_ALLOWED
+            elif info.max_count and model.max_count_reached():
+                reasons[model] = MAX_COUNT_REACHED
+        return reasons
+
+
+class PageTypeAvailability(object):
+    """
+    Page types availability for creation under parent page type: available
+    page types (in tree order) and reasons of unavailability of others.
+    """
+
+    def __init__(self, constraints, parent_model, reasons):
+        self.constraints = constraints
+        self.parent_model = parent_model
+        self.reasons = MappingProxyType(reasons)
+        self.available = tuple(
+            model for model in constraints.models if model not in reasons)
+
+    def is_available(self, model):
+        return model in self.constraints.info and model not in self.reasons
+
+    def get_reason(self, model):
+        return self.reasons.get(model, None)
+
+
+_constraints = {}
+
+
+def get_page_type_constraints(model):
+    """
+    Get constraints matrix of model's pages tree, it is built (and cached)
+    on first call if it was not built when app registry became ready.
+    """
+    base_model = model.get_base_model()
+    constraints = _constraints.get(base_model, None)
+    if constraints is None:
+        constraints = PageTypeConstraints(base_model)
+        if apps.ready:
+            _constraints[base_model] = constraints
+    return constraints
+
+
+def get_page_type_availability(model, parent_model=None):
+    """
+    Get page types availability of model's pages tree for parent page type,
+    computed once for each tree version (max_count values may be changed
+    only by pages creation or deletion, which change tree version).
+    """
+    constraints = get_page_type_constraints(model)
+    base_model = constraints.base_model
+    cache, key = get_cache(), make_key(
+        'page_types', base_model._meta.label_lower,
+        base_model.get_tree_version(),
+        parent_model._meta.label_lower if parent_model else '')
+
+    labels = cache.get(key)
+    if labels is None:
+        reasons = constraints.get_unavailability_reasons(parent_model)
+        cache.set(key, {model._meta.label_lower: reason
+                        for model, reason in reasons.items()},
+                  conf.CACHE_TIMEOUT)
+    else:
+        reasons = {constraints.labels[label]: reason
+                   for label, reason in labels.items()
+                   if label in constraints.labels}
+    return PageTypeAvailability(constraints, parent_model, reasons)
+
+
+def build_page_type_constraints():
+    """Build constraints matrices of all pages trees (on app ready)."""
+    from .base import BasePage
+
+    _constraints.clear()
+    for base_model in TI_MODEL_CLASSES:
+        if not issubclass(base_model, BasePage):
+            continue
+        try:
+            _constraints[base_model] = PageTypeConstraints(base_model)
+        except (ValueError, LookupError):
+            # invalid page types settings are reported by system checks
+            continue
@@ -1,8 +1,32 @@
+import logging
+from functools import reduce
+from operator import or_
+from django.db import transaction
 from django.db.models import Q, Manager
 from treebeard.mp_tree import MP_NodeQuerySet
+from treebeard.exceptions import InvalidPosition
+from ..signals import pages_published_changed
 from .ti import TIQuerySet
 
 
+logger = logging.getLogger('cmskit.models')
+
+
+def get_topmost_paths(paths):
+    """Get paths, which are not descendants of any other path in list."""
+    result = []
+    for path in sorted(paths):
+        if not result or not path.startswith(result[-1]):
+            result.append(path)
+    return result
+
+
+def subtrees_q(paths, prefix=''):
+    """Q object, matching subtrees (with roots) of paths."""
+    return reduce(or_, (Q(**{'%spath__startswith' % prefix: path})
+                        for path in paths))
+
+
 class TreeQuerySet(MP_NodeQuerySet):
     """
     Extends Treebeard's MP_NodeQuerySet with additional useful tree-related operations.
@@ -119,12 +143,64 @@ class TreeQuerySet(MP_NodeQuerySet):
 
 
 class PageQuerySet(TIQuerySet, TreeQuerySet):
-    def unpublish(self):
+    def publish(self, descendants=False):
+        return self.set_published(True, descendants=descendants)
+
+    def unpublish(self, descendants=False):
+        return self.set_published(False, descendants=descendants)
+
+    @transaction.atomic
+    def set_published(self, published, descendants=False):
         """
-        This unpublishes all live pages in the QuerySet.
+        Set published value of pages in queryset (and all their descendants
+        if required) and recompute active state of all affected subtrees
+        with path prefix UPDATE queries, pages_published_changed signal
+        is sent once. Return count of pages with changed published value.
         """
-        for page in self.live():
-            page.unpublish()
+        base_model = self.model.get_base_model()
+        pages = base_model.objects.all()
+
+        rows = list(self.order_by('path').values_list('pk', 'path'))
+        paths = get_topmost_paths(path for pk, path in rows)
+        if not paths:
+            return 0
+
+        count = (pages.filter(subtrees_q(paths)) if descendants else
+                 pages.filter(pk__in=[pk for pk, path in rows])
+                 ).exclude(published=published).update(published=published)
+
+        # active state of subtree root depends on its parent
+        steplen = base_model.steplen
+        active_parents = set(pages.filter(
+            path__in=[i[:-steplen] for i in paths if len(i) > steplen],
+            active=True).values_list('path', flat=True))
+        inactive = [i for i in paths
+                    if len(i) > steplen and i[:-steplen] not in active_parents]
+        active = [i for i in paths if i not in inactive]
+
+        if inactive:
+            pages.filter(subtrees_q(inactive)).exclude(
+                active=False).update(active=False)
+        if active:
+            pages.filter(subtrees_q(active)).exclude(
+                active=True).update(active=True)
+            # subtrees of unpublished pages are inactive
+            unpublished = get_topmost_paths(pages.filter(
+                subtrees_q(active), published=False,
+            ).values_list('path', flat=True))
+            if unpublished:
+                pages.filter(subtrees_q(unpublished)).exclude(
+                    active=False).update(active=False)
+
+        base_model.invalidate_tree()
+        pages_published_changed.send(
+            sender=base_model, paths=paths, published=published,
+            descendants=descendants)
+
+        logger.info('Pages %s: %d pages in %d subtrees.',
+                    'published' if published else 'unpublished',
+                    count, len(paths))
+        return count
 
     def active(self):
         return self.filter(active=True)
@@ -137,5 +213,48 @@ class BasePageManager(Manager):
     def active(self):
         return self.get_queryset().active()
 
+    CHILD_POSITIONS = ('first-child', 'last-child', 'sorted-child',)
+    SIBLING_POSITIONS = ('first-sibling', 'left', 'right', 'last-sibling',
+                         'sorted-sibling',)
+
+    @transaction.atomic
+    def insert(self, instance, target=None, pos='last-child'):
+        """
+        Insert new page instance directly to position relative to target
+        page (as root page if target is None), pos values are the same as
+        in treebeard's move method. Allowed parent types are checked before
+        insert, derived fields (paths, active, etc) are computed by page
+        save, so page is created with one INSERT query.
+        """
+        if instance.pk is not None:
+            raise ValueError('Page "%s" is already saved.' % instance)
+        if pos not in self.CHILD_POSITIONS + self.SIBLING_POSITIONS:
+            raise InvalidPosition('Invalid relative position: %s' % pos)
+
+        base_model = self.model.get_base_model()
+        if target is None:
+            return base_model.add_root(instance=instance)
+
+        # actual tree data of target (path and numchild)
+        target = base_model.objects.get(pk=target.pk)
+        parent = target if pos in self.CHILD_POSITIONS else target.get_parent()
+        if parent and not instance.can_exist_under(parent):
+            raise InvalidPosition(
+                'Can not insert "%s" (%s) to %s (%s), '
+                'allowed parent types are (%s).' % (
+                    instance, type(instance).__name__,
+                    parent, parent.specific_class.__name__,
+                    ', '.join(i.__name__ for i in
+                              instance.allowed_parent_page_models()),
+                ))
+
+        if pos == 'first-child':
+            first = target.get_first_child()
+            if first:
+                return first.add_sibling('first-sibling', instance=instance)
+        if pos in self.CHILD_POSITIONS:
+            return target.add_child(instance=instance)
+        return target.add_sibling(pos, instance=instance)
+
 
 PageManager = BasePageManager.from_queryset(PageQuerySet)
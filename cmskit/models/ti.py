@@ -3,7 +3,9 @@ import posixpath
 from collections import defaultdict
 
 from django.db import models
-from django.db.models import CharField, Q
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import CharField, Max, Min, Q
+from django.db.models.constants import LOOKUP_SEP
 from django.db.models.functions import Length, Substr
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
@@ -166,8 +168,9 @@ class TIQuerySet(models.query.QuerySet):
             ...     .first_common_ancestor()
             <Page: Foo Event Index>
 
-        This method tries to be efficient, but if you have millions of pages
-        scattered across your page tree, it will be slow.
+        The common path prefix is computed from the smallest and the largest
+        paths of the queryset, which are aggregated in the database, so this
+        method runs two queries regardless of the queryset size.
 
         If `include_self` is True, the ancestor can be one of the pages in the
         queryset:
@@ -190,29 +193,29 @@ class TIQuerySet(models.query.QuerySet):
         node is returned in these cases. If ``strict`` is True, then a
         ``ObjectDoesNotExist`` is raised.
         """
+        # The common prefix of a set of strings is the common prefix of its
+        # lexicographically smallest and largest elements, so it is enough
+        # to get MIN and MAX paths (or parent paths) from the database.
+        queryset = self.order_by()
+        if include_self:
+            field = 'path'
+        else:
+            field = 'parent_path'
+            queryset = queryset.annotate(parent_path=Substr(
+                'path', 1, Length('path') - self.model.steplen,
+                output_field=CharField(max_length=255)))
+        paths = queryset.aggregate(min_path=Min(field), max_path=Max(field))
+
         # An empty queryset has no ancestors. This is a problem
-        if not self.exists():
+        if paths['min_path'] is None:
             if strict:
                 raise self.model.DoesNotExist(
                     'Can not find ancestor of empty queryset')
             return self.model.get_first_root_node()
 
-        if include_self:
-            # Get all the paths of the matched pages.
-            paths = self.order_by().values_list('path', flat=True)
-        else:
-            # Find all the distinct parent paths of all matched pages.
-            # The empty `.order_by()` ensures that `Page.path` is not also
-            # selected to order the results, which makes `.distinct()` works.
-            paths = self.order_by()\
-                .annotate(parent_path=Substr(
-                    'path', 1, Length('path') - self.model.steplen,
-                    output_field=CharField(max_length=255)))\
-                .values_list('parent_path', flat=True)\
-                .distinct()
-
         # This method works on anything, not just file system paths.
-        common_parent_path = posixpath.commonprefix(paths)
+        common_parent_path = posixpath.commonprefix(
+            [paths['min_path'], paths['max_path']])
 
         # That may have returned a path like (0001, 0002, 000), which is
         # missing some chars off the end. Fix this by trimming the path to a
@@ -221,7 +224,7 @@ class TIQuerySet(models.query.QuerySet):
         if extra_chars != 0:
             common_parent_path = common_parent_path[:-extra_chars]
 
-        if common_parent_path is '':
+        if common_parent_path == '':
             # This should only happen when there are multiple trees,
             # a situation that Wagtail does not support;
             # or when the root node itself is part of the queryset.
@@ -256,22 +259,39 @@ class TIQuerySet(models.query.QuerySet):
             clone._iterable_class = SpecificIterable
         return clone
 
+    def _prefetch_related_objects(self):
+        # specific pages are prefetched one model class at a time
+        # in specific_iterator, where prefetch lookups are available
+        if issubclass(self._iterable_class,
+                      (SpecificIterable, DeferredSpecificIterable,)):
+            self._prefetch_done = True
+            return
+        super()._prefetch_related_objects()
+
 
 def specific_iterator(qs, defer=False):
     """
     This efficiently iterates all the specific pages in a queryset, using
     the minimum number of queries.
 
+    The ``select_related``, ``prefetch_related``, ``only``/``defer`` options
+    of the original queryset are applied to each per-type query (only for
+    the fields existing on the specific model), annotations are taken from
+    the original query and assigned to the specific instances.
+
     This should be called from ``PageQuerySet.specific``
     """
-    pks_and_types = qs.values_list('pk', 'content_type')
+    annotations = list(qs.query.annotation_select)
+    pks_and_types = list(
+        qs.prefetch_related(None)
+          .values_list('pk', 'content_type', *annotations))
     pks_by_type = defaultdict(list)
-    for pk, content_type in pks_and_types:
+    for pk, content_type, *values in pks_and_types:
         pks_by_type[content_type].append(pk)
 
     # Content types are cached by ID, so this will not run any queries.
     content_types = {pk: ContentType.objects.get_for_id(pk)
-                     for _, pk in pks_and_types}
+                     for pk in pks_by_type}
 
     # Get the specific instances of all pages, one model class at a time.
     pages_by_type = {}
@@ -279,19 +299,83 @@ def specific_iterator(qs, defer=False):
         # look up model class for this content type, falling back on the original
         # model (i.e. Page) if the more specific one is missing
         model = content_types[content_type].model_class() or qs.model
-        pages = model.objects.filter(pk__in=pks)
+        pages = model._base_manager.using(qs.db).filter(pk__in=pks)
+        pages = apply_queryset_options(pages, qs)
 
         if defer:
             # Defer all specific fields
-            from wagtail.core.models import Page
-            fields = [field.attname for field in Page._meta.get_fields() if field.concrete]
+            base_model = qs.model.get_base_model()
+            fields = [field.attname for field in base_model._meta.get_fields()
+                      if field.concrete]
             pages = pages.only(*fields)
 
         pages_by_type[content_type] = {page.pk: page for page in pages}
 
     # Yield all of the pages, in the order they occurred in the original query.
-    for pk, content_type in pks_and_types:
-        yield pages_by_type[content_type][pk]
+    for pk, content_type, *values in pks_and_types:
+        page = pages_by_type[content_type][pk]
+        for name, value in zip(annotations, values):
+            setattr(page, name, value)
+        yield page
+
+
+def flatten_select_related(select_related, prefix=''):
+    """
+    Convert nested select_related dict of query into the list of
+    "a__b" lookups (only the deepest ones, they imply their parents).
+    """
+    lookups = []
+    for name, nested in select_related.items():
+        lookup = prefix + name
+        if nested:
+            lookups += flatten_select_related(nested, lookup + LOOKUP_SEP)
+        else:
+            lookups.append(lookup)
+    return lookups
+
+
+def apply_queryset_options(queryset, source):
+    """
+    Apply ``select_related``, ``prefetch_related`` and ``only``/``defer``
+    options of ``source`` queryset to ``queryset``, skipping lookups, which
+    are not available on the ``queryset`` model.
+    """
+    model = queryset.model
+
+    def has_lookup(lookup):
+        name = lookup.prefetch_through if isinstance(
+            lookup, models.Prefetch) else lookup
+        name = name.split(LOOKUP_SEP, 1)[0]
+        if name == 'pk':
+            return True
+        try:
+            model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return hasattr(model, name)
+        return True
+
+    select_related = source.query.select_related
+    if select_related is True:
+        queryset = queryset.select_related()
+    elif select_related:
+        lookups = [i for i in flatten_select_related(select_related)
+                   if has_lookup(i)]
+        queryset = queryset.select_related(*lookups) if lookups else queryset
+
+    lookups = [i for i in source._prefetch_related_lookups if has_lookup(i)]
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+
+    names, is_defer = source.query.deferred_loading
+    names = [i for i in names if has_lookup(i)]
+    if is_defer and names:
+        queryset = queryset.defer(*names)
+    elif not is_defer and names:
+        # related fields of parent models should be loaded explicitly
+        names += [i.split(LOOKUP_SEP, 1)[0] for i in names if LOOKUP_SEP in i]
+        queryset = queryset.only(*names)
+
+    return queryset
 
 
 class SpecificIterable(models.query.BaseIterable):
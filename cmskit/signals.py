@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+
+# Sent once after bulk publish or unpublish of pages (see
+# PageQuerySet.set_published) in the same transaction, arguments:
+#   sender      - base pages model,
+#   paths       - paths of topmost pages of changed subtrees,
+#   published   - new published value,
+#   descendants - whether descendants were also changed.
+# Receivers should update data, which depends on pages active state.
+pages_published_changed = Signal()
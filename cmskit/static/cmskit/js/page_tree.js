@@ -0,0 +1,101 @@
+/* Lazy page tree selection widget (see cmskit.widgets.PageTreeWidget). */
+(function() {
+    'use strict';
+
+    function request(tree, params, callback) {
+        var url = tree.getAttribute('data-tree-url'),
+            query = [], xhr = new XMLHttpRequest();
+        for (var key in params) {
+            if (params[key] !== null && params[key] !== undefined) {
+                query.push(encodeURIComponent(key) + '=' +
+                           encodeURIComponent(params[key]));
+            }
+        }
+        xhr.open('GET', url + (query.length ? '?' + query.join('&') : ''));
+        xhr.onload = function() {
+            if (xhr.status === 200) {
+                callback(JSON.parse(xhr.responseText));
+            }
+        };
+        xhr.send();
+    }
+
+    function select(tree, node) {
+        tree.querySelector('input[type=hidden]').value = node ? node.id : '';
+        tree.querySelector('.cmskit-page-tree-selected strong').textContent = (
+            node ? node.label : '---------');
+    }
+
+    function load(tree, list, parent, offset) {
+        request(tree, {parent: parent, offset: offset}, function(data) {
+            var more = list.querySelector(':scope > .cmskit-page-tree-more');
+            if (more) {
+                list.removeChild(more);
+            }
+            data.results.forEach(function(node) {
+                list.appendChild(render(tree, node));
+            });
+            if (data.next !== null) {
+                more = document.createElement('li');
+                more.className = 'cmskit-page-tree-more';
+                more.innerHTML = '<a href="#">...</a>';
+                more.firstChild.addEventListener('click', function(event) {
+                    event.preventDefault();
+                    load(tree, list, parent, data.next);
+                });
+                list.appendChild(more);
+            }
+        });
+    }
+
+    function render(tree, node) {
+        var item = document.createElement('li'),
+            toggle = document.createElement('a'),
+            label = document.createElement('a'),
+            children = null;
+
+        toggle.href = '#';
+        toggle.textContent = node.numchild ? '+ ' : '  ';
+        toggle.addEventListener('click', function(event) {
+            event.preventDefault();
+            if (!node.numchild) {
+                return;
+            }
+            if (children === null) {
+                children = document.createElement('ul');
+                item.appendChild(children);
+                load(tree, children, node.id, 0);
+            } else {
+                children.hidden = !children.hidden;
+            }
+            toggle.textContent = children.hidden ? '+ ' : '- ';
+        });
+
+        label.href = '#';
+        label.textContent = node.label;
+        label.addEventListener('click', function(event) {
+            event.preventDefault();
+            select(tree, node);
+        });
+
+        item.appendChild(toggle);
+        item.appendChild(label);
+        return item;
+    }
+
+    function init(tree) {
+        tree.querySelector('.cmskit-page-tree-clear').addEventListener(
+            'click', function(event) {
+                event.preventDefault();
+                select(tree, null);
+            });
+        load(tree, tree.querySelector('.cmskit-page-tree-nodes'), null, 0);
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        var trees = document.querySelectorAll('.cmskit-page-tree');
+        for (var i = 0; i < trees.length; i++) {
+            init(trees[i]);
+        }
+    });
+})();
@@ -1,4 +1,21 @@
+import datetime
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from cmskit.utils.cache import get_cache
+from cmskit.contrib.items.views import ItemPageView
+from cmskit.contrib.items.operations import RecountItems, FillItemsUrlPaths
+from cmskit.contrib.search.backends import DatabaseSearchBackend
+from cmskit.contrib.search.models import SearchEntry
+from .models import Page, ItemPage, Item
 
 
 class BillingTest(TestCase):
@@ -7,3 +24,270 @@ class BillingTest(TestCase):
 
     def test_check_value(self):
         self.assertEqual(self.check_value, 1)
+
+
+class ItemsTestMixin:
+    def setUp(self):
+        # versioned cache keys contain page ids, which are reused by tests
+        get_cache().clear()
+        self.root = Page.objects.insert(
+            Page(title='Root', slug='root', published=True))
+        self.page = ItemPage.objects.get(pk=Page.objects.insert(
+            ItemPage(title='News', slug='news', published=True), self.root).pk)
+
+    def create_items(self, count, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [Item.objects.create(page=self.page, title='Item %s' % i,
+                                        slug='item-%s' % i, **kwargs)
+                    for i in range(count)]
+
+    def get_items_count(self):
+        return ItemPage.objects.get(pk=self.page.pk).items_count
+
+    def get_list_titles(self):
+        response = self.client.get('/pages/root/news/')
+        self.assertEqual(response.status_code, 200)
+        return [item.title for item in response.context['page_item']]
+
+
+class ItemsCountTest(ItemsTestMixin, TestCase):
+    def test_item_save_and_delete(self):
+        items = self.create_items(3)
+        self.assertEqual(self.get_items_count(), 3)
+        items[0].delete()
+        self.assertEqual(self.get_items_count(), 2)
+
+    def test_bulk_delete(self):
+        self.create_items(5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.filter(slug__in=('item-0', 'item-1',)).delete()
+        self.assertEqual(self.get_items_count(), 3)
+        self.assertEqual(len(self.get_list_titles()), 3)
+
+    def test_zero_count_is_not_trusted(self):
+        self.create_items(3)
+        ItemPage.objects.filter(pk=self.page.pk).update(items_count=0)
+        self.assertEqual(len(self.get_list_titles()), 3)
+
+    def test_recount_items_operation(self):
+        self.create_items(3)
+        ItemPage.objects.filter(pk=self.page.pk).update(items_count=0)
+        RecountItems('pages.ItemPage').code(apps, None)
+        self.assertEqual(self.get_items_count(), 3)
+
+
+class ItemsUrlPathTest(ItemsTestMixin, TestCase):
+    def test_item_url(self):
+        item = self.create_items(1)[0]
+        self.assertEqual(item.url_path, 'root/news/item-0')
+        self.assertEqual(item.get_absolute_url(), '/pages/root/news/item-0/')
+        response = self.client.get('/pages/root/news/item-0/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['item'], item)
+        response = self.client.get('/pages/root/news/item-1/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_filled_url_path(self):
+        # items created before url_path field was added
+        item = self.create_items(2)[1]
+        Item.objects.update(url_path=None)
+        item = Item.objects.get(pk=item.pk)
+        self.assertEqual(item.get_absolute_url(), '/pages/root/news/item-1/')
+        response = self.client.get('/pages/root/news/item-1/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['item'], item)
+
+    def test_fill_url_paths_operation(self):
+        self.create_items(2)
+        Item.objects.update(url_path=None)
+        # sqlite schema editor can not be opened in test transaction,
+        # operation uses only its connection
+        schema_editor = SimpleNamespace(connection=connection)
+        FillItemsUrlPaths('pages.Item').code(apps, schema_editor)
+        self.assertEqual(
+            sorted(Item.objects.values_list('url_path', flat=True)),
+            ['root/news/item-0', 'root/news/item-1'])
+        response = self.client.get('/pages/root/news/item-1/')
+        self.assertEqual(response.status_code, 200)
+
+
+class ItemsSweepTest(ItemsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.page.filter_date = 'date_actual'
+        self.page.save()
+        now = timezone.now()
+        self.create_items(1, date_start=now - datetime.timedelta(days=1))
+        self.item = Item.objects.create(
+            page=self.page, title='Announce', slug='announce',
+            date_start=now + datetime.timedelta(days=1))
+        # start date is passed, but state is not updated yet
+        Item.objects.filter(pk=self.item.pk).update(
+            date_start=now - datetime.timedelta(hours=1))
+
+    def sweep(self, *args):
+        stdout = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('cmskit_items_sweep', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_requests_do_not_sweep(self):
+        self.assertEqual(self.get_list_titles(), ['Item 0'])
+        self.assertFalse(Item.objects.get(pk=self.item.pk).date_started)
+
+    def test_sweep(self):
+        version = self.page.get_items_version()
+        self.assertEqual(self.get_items_count(), 1)
+        output = self.sweep()
+        self.assertIn('pages.Item: next boundary is not defined.', output)
+        self.assertTrue(Item.objects.get(pk=self.item.pk).date_started)
+        self.assertEqual(self.get_items_count(), 2)
+        self.assertNotEqual(self.page.get_items_version(), version)
+        self.assertEqual(self.get_list_titles(), ['Announce', 'Item 0'])
+
+    def test_full_sweep(self):
+        self.sweep()
+        # start date is moved to future, only full sweep resets state
+        date_start = timezone.now() + datetime.timedelta(days=2)
+        Item.objects.filter(pk=self.item.pk).update(date_start=date_start)
+        self.sweep()
+        self.assertTrue(Item.objects.get(pk=self.item.pk).date_started)
+        output = self.sweep('--full')
+        self.assertIn('pages.Item: next boundary is %s.' % date_start, output)
+        self.assertFalse(Item.objects.get(pk=self.item.pk).date_started)
+        self.assertEqual(self.get_items_count(), 1)
+
+
+class SearchTest(ItemsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = Page.objects.insert(
+            Page(title='Hello page', slug='other', published=True), self.root)
+        for title, published in (('Hello world', True,),
+                                 ('Hello draft', False,),
+                                 ('Goodbye', True,),):
+            Item.objects.create(page=self.page, title=title,
+                                slug=title.lower().replace(' ', '-'),
+                                published=published)
+
+    def get_titles(self, queryset):
+        return sorted(queryset.values_list('title', flat=True))
+
+    def test_search(self):
+        entries = SearchEntry.objects.active()
+        self.assertEqual(self.get_titles(entries.search('hello')),
+                         ['Hello page', 'Hello world'])
+        self.assertEqual(self.get_titles(entries.search('hel')),
+                         ['Hello page', 'Hello world'])
+        self.assertEqual(self.get_titles(entries.search('')), [])
+
+    def test_descendant_of(self):
+        entries = SearchEntry.objects.active()
+        self.assertEqual(self.get_titles(entries.descendant_of(self.root)), [
+            'Goodbye', 'Hello page', 'Hello world', 'News', 'Root'])
+        # not inclusive subtree keeps items of page itself
+        self.assertEqual(
+            self.get_titles(entries.descendant_of(self.page, False)),
+            ['Goodbye', 'Hello world'])
+        self.assertEqual(self.get_titles(
+            entries.descendant_of(self.page, False).search('hello')),
+            ['Hello world'])
+
+    def test_database_backend(self):
+        entries = SearchEntry.objects.active().descendant_of(self.root)
+        result = DatabaseSearchBackend('default').search(entries, 'HELLO')
+        # the latest entries are the first
+        self.assertEqual(list(result.values_list('title', flat=True)),
+                         ['Hello world', 'Hello page'])
+
+
+@mock.patch.object(ItemPageView, 'list_cache', True)
+class ItemsCacheTest(ItemsTestMixin, TestCase):
+    def get_list_fragment(self):
+        response = self.client.get('/pages/root/news/')
+        self.assertEqual(response.status_code, 200)
+        # fragment template context is the first one and has no fragment
+        return response.context[-1]['list_fragment']
+
+    def test_item_save(self):
+        item = self.create_items(3)[0]
+        self.assertIn('Item 0', self.get_list_fragment())
+        item.title = 'Changed'
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertIn('Changed', self.get_list_fragment())
+
+    def test_item_delete(self):
+        items = self.create_items(3)
+        self.assertEqual(self.get_list_fragment().count('<li>'), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            items[0].delete()
+        self.assertNotIn('Item 0', self.get_list_fragment())
+
+    def test_bulk_delete(self):
+        self.create_items(3)
+        self.assertEqual(self.get_list_fragment().count('<li>'), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.exclude(slug='item-2').delete()
+        fragment = self.get_list_fragment()
+        self.assertEqual(fragment.count('<li>'), 1)
+        self.assertIn('Item 2', fragment)
+
+
+class ItemsArchiveTest(ItemsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.date = timezone.now() - datetime.timedelta(days=1)
+        self.create_items(2, date_start=self.date)
+
+    def get_archive(self):
+        return ItemPage.objects.get(pk=self.page.pk).get_archive()
+
+    def test_bulk_delete(self):
+        self.assertEqual(self.get_archive(),
+                         [(self.date.year, self.date.month, 2,)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.all().delete()
+        self.assertEqual(self.get_archive(), [])
+        response = self.client.get('/pages/root/news/%s/' % self.date.year)
+        self.assertEqual(response.status_code, 404)
+
+    def test_sweep(self):
+        item = Item.objects.create(
+            page=self.page, title='Announce', slug='announce',
+            date_start=timezone.now() + datetime.timedelta(days=1))
+        self.page.filter_date = 'date_actual'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save()
+        self.assertEqual(self.get_archive(),
+                         [(self.date.year, self.date.month, 2,)])
+        Item.objects.filter(pk=item.pk).update(date_start=self.date)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('cmskit_items_sweep', stdout=StringIO())
+        self.assertEqual(self.get_archive(),
+                         [(self.date.year, self.date.month, 3,)])
+
+
+class PageAdminTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+
+    def test_add_with_malformed_target_page(self):
+        content_type = ContentType.objects.get_for_model(Page)
+        for target_page in ('abc', '1.5', '999',):
+            response = self.client.get('/admin/pages/page/add/', {
+                'target_type': content_type.id, 'target_page': target_page})
+            self.assertEqual(response.status_code, 302)
+            self.assertIn('target_type=%s' % content_type.id, response.url)
+
+
+class FieldsetsDictTest(TestCase):
+    def test_cached_fieldsets_are_not_changed(self):
+        model_admin = admin.site._registry[Item]
+        fieldsets = model_admin.get_fieldsets(None)
+        changed = model_admin.get_fieldsets(None)
+        changed[0][1]['fields'] = ('title',)
+        changed[1][1].setdefault('classes', []).append('collapse')
+        changed.append(('Extra', {'fields': ('url',)}))
+        self.assertEqual(model_admin.get_fieldsets(None), fieldsets)
@@ -46,6 +46,8 @@ INSTALLED_APPS = [
     'pages',
 
     'cmskit',
+    'cmskit.contrib.items',
+    'cmskit.contrib.search',
     'nodes',
 
     'treebeard',
@@ -90,6 +92,9 @@ DATABASES = {
     }
 }
 
+# test app has no migrations, its tables are created from models
+MIGRATION_MODULES = {'pages': None}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
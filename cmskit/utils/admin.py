@@ -2,6 +2,10 @@ import copy
 from . import dicts_deep_merge
 
 
+# merged fieldsets of admin classes, {admin class: fieldsets}
+_merged_fieldsets = {}
+
+
 class FieldsetsDictMixin:
     """
     Mixin, that allows to simplify admin fieldsets definition and extending.
@@ -39,35 +43,49 @@ class FieldsetsDictMixin:
     """
 
     def get_fieldsets(self, request, obj=None):
-        fieldsets_dicts = [
-            getattr(cls, 'fieldsets_dict', {}) for cls in type(self).__mro__
-        ]
-        if fieldsets_dicts:
-            fieldsets_dicts = copy.deepcopy(fieldsets_dicts)
-            fieldsets_dict, fieldsets = {}, []
-
-            # merge all fieldsets_dicts from all ancestors by following rules:
-            # - value is None or '**' value is False - stop further extending
-            # - value is not empty - merge it with fieldsets_dict
-            for fsdict in fieldsets_dicts:
-                if fsdict is None:
-                    break
-                extend_parent_fieldsets = fsdict.pop('**', True)
-                fieldsets_dict = dicts_deep_merge(fsdict, fieldsets_dict)
-                if not extend_parent_fieldsets:
-                    break
-
-            # convert dict to django's builtin fieldsets format
-            if fieldsets_dict:
-                for key, data in fieldsets_dict.items():
-                    if not 'fields' in data:
-                        continue
-                    fieldsets.append((data.pop('title', None), data,))
-
-            if fieldsets:
-                return fieldsets
+        fieldsets = self.get_fieldsets_from_dicts()
+        if fieldsets:
+            # cached value is shared by all requests, so it is deep copied
+            return copy.deepcopy(list(fieldsets))
 
         if self.fieldsets:
             return self.fieldsets
 
         return [(None, {'fields': self.get_fields(request, obj)})]
+
+    @classmethod
+    def get_fieldsets_from_dicts(cls):
+        """
+        Get fieldsets, merged from fieldsets_dict values of all ancestors,
+        merging is done once for each admin class.
+        """
+        fieldsets = _merged_fieldsets.get(cls, None)
+        if fieldsets is None:
+            fieldsets = _merged_fieldsets[cls] = cls.merge_fieldsets_dicts()
+        return fieldsets
+
+    @classmethod
+    def merge_fieldsets_dicts(cls):
+        fieldsets_dicts = copy.deepcopy([
+            getattr(klass, 'fieldsets_dict', {}) for klass in cls.__mro__
+        ])
+        fieldsets_dict, fieldsets = {}, []
+
+        # merge all fieldsets_dicts from all ancestors by following rules:
+        # - value is None or '**' value is False - stop further extending
+        # - value is not empty - merge it with fieldsets_dict
+        for fsdict in fieldsets_dicts:
+            if fsdict is None:
+                break
+            extend_parent_fieldsets = fsdict.pop('**', True)
+            fieldsets_dict = dicts_deep_merge(fsdict, fieldsets_dict)
+            if not extend_parent_fieldsets:
+                break
+
+        # convert dict to django's builtin fieldsets format
+        for key, data in fieldsets_dict.items():
+            if not 'fields' in data:
+                continue
+            fieldsets.append((data.pop('title', None), data,))
+
+        return tuple(fieldsets)
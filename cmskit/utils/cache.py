@@ -0,0 +1,41 @@
+import time
+from django.core.cache import caches
+from django.db import transaction
+from .. import conf
+
+
+def get_cache():
+    return caches[conf.CACHE_ALIAS]
+
+
+def make_key(*parts):
+    return ':'.join(str(i) for i in (conf.CACHE_PREFIX,) + parts)
+
+
+def get_version(name):
+    """
+    Get current version of named data set (tree, item page, etc).
+    Version is a part of cache keys of all data, depending on that data set,
+    so bumping it invalidates all those keys at once.
+    """
+    cache, key = get_cache(), make_key('version', name)
+    version = cache.get(key)
+    if version is None:
+        # initial value is time based, so version lost from cache
+        # (evicted or expired) will never match outdated cached data
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    cache, key = get_cache(), make_key('version', name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def bump_version_on_commit(name):
+    """Bump version after current transaction commit (or immediately)."""
+    transaction.on_commit(lambda: bump_version(name))
@@ -1,3 +1,13 @@
+import json
+import base64
+import datetime
+from django.core import paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+
 class PaginationBase(object):
     """
     Usage:
@@ -97,3 +107,233 @@ class Pagination(PaginationBase):
 
         for i in range(start, end + 1):
             self.pages.append({'current': i == number, 'number': i,})
+
+
+class Paginator(paginator.Paginator):
+    """
+    Core paginator, which accepts known objects count,
+    so COUNT query is not executed if count value is passed.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class EstimatedCountPaginator(paginator.Paginator):
+    """
+    Core paginator for large tables, which does not count all rows:
+    count of unfiltered queryset is taken from database statistics
+    (PostgreSQL and MySQL) if it is greater than count_limit, filtered
+    querysets are counted up to count_limit + 1 rows.
+    """
+
+    count_limit = 10000
+
+    def get_estimated_count(self, queryset):
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            sql = 'SELECT reltuples FROM pg_class WHERE oid = %s::regclass'
+            params = [connection.ops.quote_name(table)]
+        elif connection.vendor == 'mysql':
+            sql = ('SELECT table_rows FROM information_schema.tables'
+                   ' WHERE table_schema = DATABASE() AND table_name = %s')
+            params = [table]
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return len(queryset)
+        if not queryset.query.where:
+            estimated = self.get_estimated_count(queryset)
+            if estimated is not None and estimated > self.count_limit:
+                return estimated
+        return queryset[:self.count_limit + 1].count()
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """JSON encoder, which keeps microseconds of datetime values."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time,)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage(object):
+    """
+    Page of keyset paginator, similar to core paginator Page object,
+    but without page number, it is defined by cursors of adjacent pages.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __repr__(self):
+        return '<Keyset page of %s objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            return self.paginator.get_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            return self.paginator.get_cursor(self.object_list[0])
+        return None
+
+
+class KeysetPaginator(object):
+    """
+    Keyset (cursor) paginator, each page is selected by "ordering values
+    greater (or less) than cursor values" condition instead of OFFSET,
+    so any page costs the same as the first one, and no COUNT is required.
+
+    Usage:
+        paginator = KeysetPaginator(queryset, 20, ('-date_start', 'title',))
+        page = paginator.page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
+
+    The "id" field is always appended to ordering as a tie-breaker.
+    NULL values are treated as the smallest ones for any database.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        ordering = [i for i in ordering if i]
+        if not any(i.lstrip('-') in ('id', 'pk',) for i in ordering):
+            ordering.append('-id' if ordering and
+                            ordering[0].startswith('-') else 'id')
+
+        meta = queryset.model._meta
+        self.queryset, self.per_page = queryset, int(per_page)
+        self.fields = [
+            (meta.pk if i.lstrip('-') == 'pk' else
+             meta.get_field(i.lstrip('-')), i.startswith('-'),)
+            for i in ordering
+        ]
+
+    def get_order_by(self, reverse=False):
+        return [
+            F(field.attname).desc(nulls_last=True) if desc != reverse else
+            F(field.attname).asc(nulls_first=True)
+            for field, desc in self.fields
+        ]
+
+    def get_keyset_q(self, values, reverse=False):
+        """Get condition of rows, placed after values (before if reverse)."""
+        q, equal = Q(), Q()
+        for (field, desc), value in zip(self.fields, values):
+            name = field.attname
+            if desc != reverse:
+                # less than value (nothing is less than NULL)
+                condition = None if value is None else (
+                    Q(**{'%s__lt' % name: value}) |
+                    Q(**{'%s__isnull' % name: True}))
+            else:
+                # greater than value (anything is greater than NULL)
+                condition = (Q(**{'%s__isnull' % name: False})
+                             if value is None else
+                             Q(**{'%s__gt' % name: value}))
+            if condition is not None:
+                q |= equal & condition
+            equal &= (Q(**{'%s__isnull' % name: True}) if value is None else
+                      Q(**{name: value}))
+        return q
+
+    def get_cursor(self, obj):
+        values = [getattr(obj, field.attname) for field, desc in self.fields]
+        value = json.dumps(values, cls=CursorJSONEncoder).encode('utf-8')
+        return base64.urlsafe_b64encode(value).decode('ascii').rstrip('=')
+
+    def parse_cursor(self, cursor):
+        """Get values from cursor string or None if it is invalid."""
+        try:
+            value = base64.urlsafe_b64decode(
+                cursor.encode('ascii') + b'=' * (-len(cursor) % 4))
+            values = json.loads(value.decode('utf-8'))
+            if len(values) != len(self.fields):
+                return None
+            return [None if value is None else field.to_python(value)
+                    for (field, desc), value in zip(self.fields, values)]
+        except Exception:
+            return None
+
+    def page(self, after=None, before=None):
+        """
+        Get page after "after" cursor or before "before" cursor,
+        invalid or empty cursors mean the first page.
+        """
+        reverse = bool(before) and not after
+        values = self.parse_cursor(before if reverse else after or '')
+        reverse = reverse and values is not None
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self.get_keyset_q(values, reverse))
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+            return KeysetPage(object_list, self, True, has_more)
+        return KeysetPage(object_list, self, has_more, values is not None)
+
+
+class KeysetPagination(PaginationBase):
+    """
+    Window-less pagination for keyset paginator pages.
+
+    usage:
+        pagination = KeysetPagination(page)
+
+    template:
+        {% if pagination and pagination.prev or pagination.next %}
+        <ul id="pagination">
+            {% if pagination.first %}<li class="first"><a href="?">{% trans "first" %}</a></li>{% endif %}
+            {% if pagination.prev %}<li class="prev"><a href="?before={{ pagination.prev }}">{% trans "prev" %}</a></li>{% endif %}
+            {% if pagination.next %}<li class="next"><a href="?after={{ pagination.next }}">{% trans "next" %}</a></li>{% endif %}
+        </ul>
+        {% endif %}
+    """
+
+    keyset = True
+
+    def __init__(self, page):
+        self.page = page
+        self.paginate()
+
+    def paginate(self):
+        page = self.page
+
+        self.pages = []
+        self.first = page.has_previous() or None
+        self.prev = page.previous_cursor
+        self.next = page.next_cursor
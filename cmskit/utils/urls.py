@@ -0,0 +1,82 @@
+from urllib.parse import quote
+from django.urls import (reverse, get_resolver, get_urlconf,
+                         get_script_prefix, NoReverseMatch)
+from django.utils.http import RFC3986_SUBDELIMS
+
+
+class PageUrlBuilder(object):
+    """
+    Pages url builder, which calls reverse only once for each
+    (base model, view_name) pair and then builds urls by concatenation
+    of resolved prefix, page url_path and resolved suffix.
+
+    Resolved values are dropped if urlconf is reloaded (url resolver
+    caches are cleared), so it is safe to use it as singleton.
+
+    Usage:
+        page_url_builder.get_url(page)              # by stored fields
+        page_url_builder.get_url_for_path(Page, 'some/path')
+    """
+
+    placeholder = 'cmskit-path-placeholder'
+    safe_chars = RFC3986_SUBDELIMS + '/~:@'
+
+    def __init__(self):
+        self.resolver = None
+        self.patterns = {}
+        self.view_names = {}
+
+    def get_view_name(self, model):
+        view_name = self.view_names.get(model, None)
+        if view_name is None:
+            meta = model.get_base_model()._meta
+            view_name = model.view_name.format(app_label=meta.app_label,
+                                               model_name=meta.model_name)
+            self.view_names[model] = view_name
+        return view_name
+
+    def get_pattern(self, view_name):
+        """
+        Get (prefix, suffix) pair for view_name or None if view url
+        can not be splitted by path placeholder (reverse is required).
+        """
+        resolver = get_resolver(get_urlconf())
+        if resolver is not self.resolver:
+            self.resolver, self.patterns = resolver, {}
+
+        key = (view_name, get_script_prefix(),)
+        if key not in self.patterns:
+            try:
+                url = reverse(view_name, kwargs={'path': self.placeholder})
+            except NoReverseMatch:
+                url = ''
+            parts = url.split(self.placeholder)
+            self.patterns[key] = tuple(parts) if len(parts) == 2 else None
+        return self.patterns[key]
+
+    def get_url_for_path(self, model, path):
+        view_name = self.get_view_name(model)
+        pattern = self.get_pattern(view_name)
+        if pattern is None:
+            return reverse(view_name, kwargs={'path': path,})
+        return '%s%s%s' % (pattern[0], quote(path, safe=self.safe_chars),
+                           pattern[1],)
+
+    def get_url(self, page, model=None):
+        """
+        Get page url by its stored fields values (url_name, url_path and
+        url_text), so it also works with partially loaded page objects
+        and page-like records (model value is required in this case).
+        """
+        if page.url_name:
+            return reverse(page.url_name)
+        if page.url_path:
+            return self.get_url_for_path(model or type(page), page.url_path)
+        if page.url_text and ('://' in page.url_text or
+                              page.url_text.startswith('/')):
+            return page.url_text
+        return None
+
+
+# page url builder singleton
+page_url_builder = PageUrlBuilder()
@@ -54,8 +54,10 @@ class PageView(TemplateView):
 
         Page = self.page_model
 
-        # get current node
+        # get current node, also available for menus and other request
+        # based consumers as request.current_page
         node = self.get_node(Page)
+        request.current_page = node
 
         # set instance data
         view = self.get_view_for_page(node)
@@ -144,6 +146,11 @@ class PageView(TemplateView):
 
     def set_template_name_variants(self, template_type,
                                    template_name=None, models=None,):
+        self.template_name = self.get_template_name_variants(
+            template_type, template_name, models)
+
+    def get_template_name_variants(self, template_type,
+                                   template_name=None, models=None,):
         bases = ['%s.html' % template_type]
         if template_name:
             bases = ['%s.%s.html' % (template_type, template_name)] + bases
@@ -154,7 +161,7 @@ class PageView(TemplateView):
                                model._meta.model_name) for model in models
             ] + paths
 
-        self.template_name = [(p % b) for b in bases for p in paths]
+        return [(p % b) for b in bases for p in paths]
 
     def get_alt_view_by_name(self, view_name, obj_type):
         """get extraview by name and type"""
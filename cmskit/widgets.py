@@ -0,0 +1,45 @@
+from django import forms
+
+
+class PageTreeWidget(forms.Widget):
+    """
+    Lazy page tree selection widget for ModelChoiceField of pages: choices
+    are not rendered, tree nodes are loaded by levels from tree_url JSON
+    endpoint (see BasePageAdmin.tree_view), only selected page is queried.
+    Chosen value is validated by field's queryset as usual.
+    """
+
+    template_name = 'cmskit/widgets/page_tree.html'
+    tree_url = None
+
+    class Media:
+        js = ('cmskit/js/page_tree.js',)
+
+    def __init__(self, attrs=None, tree_url=None):
+        super().__init__(attrs)
+        self.tree_url = tree_url or self.tree_url
+
+    def format_value(self, value):
+        # initial value may be taken from QueryDict as list
+        if isinstance(value, (list, tuple,)):
+            value = value[0] if value else None
+        return super().format_value(value)
+
+    def get_selected_label(self, value):
+        choices = getattr(self, 'choices', None)
+        field = getattr(choices, 'field', None)
+        if field is None or value in field.empty_values:
+            return ''
+        try:
+            obj = field.queryset.filter(pk=value).first()
+        except (ValueError, TypeError):
+            return ''
+        return field.label_from_instance(obj) if obj else ''
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget'].update({
+            'tree_url': self.tree_url,
+            'label': self.get_selected_label(context['widget']['value']),
+        })
+        return context